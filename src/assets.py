@@ -0,0 +1,98 @@
+import math
+import os
+import pygame
+from profiler import profiler
+from settings import ROTATION_BUCKETS
+
+
+class AssetManager:
+    def __init__(self):
+        # (path, rect, scale, flip, tint) -> Surface, built once per process and shared by every sprite
+        self.cache = {}
+        # key -> RotationSet, for images drawn at arbitrary angles (projectiles)
+        self.rotation_sets = {}
+
+    def get(self, path, rect=None, scale=None, flip=False, tint=None):
+        """Return the image at path, optionally cut to rect, scaled, flipped horizontally
+        and multiplied by an RGBA tint."""
+        key = (
+            os.path.normpath(path),
+            tuple(rect) if rect is not None else None,
+            tuple(scale) if scale is not None else None,
+            flip,
+            tuple(tint) if tint is not None else None
+        )
+        image = self.cache.get(key)
+        if image is None:
+            profiler.increment('surface allocs')
+            image = self.build(*key)
+            self.cache[key] = image
+        return image
+
+    def build(self, path, rect, scale, flip, tint):
+        # Each step reuses the cached result of the step before it
+        if tint is not None:
+            image = self.get(path, rect, scale, flip).copy()
+            image.fill(tint, special_flags=pygame.BLEND_RGBA_MULT)
+            return image
+        if flip:
+            return pygame.transform.flip(self.get(path, rect, scale), True, False)
+        if scale is not None:
+            return pygame.transform.scale(self.get(path, rect), scale)
+        if rect is not None:
+            return self.get(path).subsurface(pygame.Rect(rect))
+        return pygame.image.load(path).convert_alpha()
+
+    def rotated(self, key, frames, buckets=ROTATION_BUCKETS):
+        """Return the shared RotationSet for key, pre-rendering frames on first use."""
+        rotations = self.rotation_sets.get(key)
+        if rotations is None:
+            rotations = self.rotation_sets[key] = RotationSet(frames, buckets)
+        return rotations
+
+    def clear(self):
+        self.cache.clear()
+        self.rotation_sets.clear()
+
+
+# Shared instance; only use after pygame.display.set_mode (images are converted on load)
+assets = AssetManager()
+
+
+class AnimationSet:
+    def __init__(self, specs, tints=()):
+        # specs maps an animation name to its frames as (path, rect, scale) tuples
+        self.specs = specs
+        self.variants = {}  # (name, flipped, tint) -> list of frames
+
+        # Build every flipped/tinted variant up front so animating never touches a surface
+        for name in specs:
+            for flip in (False, True):
+                for tint in (None, *tints):
+                    self.frames(name, flip, tint)
+
+    def frames(self, name, flip=False, tint=None):
+        key = (name, flip, tint)
+        frames = self.variants.get(key)
+        if frames is None:
+            frames = self.variants[key] = [
+                assets.get(path, rect, scale, flip, tint) for path, rect, scale in self.specs[name]
+            ]
+        return frames
+
+
+class RotationSet:
+    def __init__(self, frames, buckets=ROTATION_BUCKETS):
+        # Every frame rotated to each of `buckets` evenly spaced angles; 0 faces right
+        self.buckets = buckets
+        self.step = 360 / buckets
+        self.rotations = [
+            [pygame.transform.rotate(frame, -bucket * self.step) for frame in frames]
+            for bucket in range(buckets)
+        ]
+        profiler.increment('surface allocs', buckets * len(frames))
+
+    def frames(self, direction):
+        # The frames whose angle is closest to direction (screen coordinates, y down)
+        angle = math.degrees(math.atan2(direction[1], direction[0]))
+        return self.rotations[round(angle / self.step) % self.buckets]
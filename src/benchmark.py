@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# Headless: no window and no audio device needed
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from controls import ScriptedControls, UP, DOWN, LEFT, RIGHT
+from profiler import profiler
+from replay import Recording
+from weapon import WEAPON_PRESETS
+from world import ChunkedWorld
+from settings import SCREEN_HEIGHT, SCREEN_WIDTH, SIM_RATE, TILE_SIZE
+
+# Walk a slow loop around the middle of the map so the camera and weapon aim keep changing
+PATROL = [(90, RIGHT), (60, DOWN), (90, LEFT | DOWN), (60, UP), (90, LEFT), (60, UP | RIGHT)]
+
+SCENARIOS = {
+    'empty': {'enemies': 0, 'spawning': False},
+    'idle': {'enemies': 0, 'spawning': False, 'still': True},  # Player and camera never move
+    'enemies_100': {'enemies': 100},
+    'enemies_500': {'enemies': 500},
+    'enemies_2000': {'enemies': 2000},
+    'projectile_storm': {'enemies': 100, 'weapon_cooldown': 0, 'projectile_lifespan': 3000},
+    'late_game': {'enemies': 500, 'weapons': list(WEAPON_PRESETS)},
+    'arena_1000': {'enemies': 500, 'world': 1000},  # Streamed 1000x1000-cell world
+}
+
+
+def populate(level, count, radius=32):
+    # Scatter enemies over open cells around the player instead of stacking them on the spawn points
+    grid = level.collision_grid
+    center_col = level.player_sprite.rect.centerx // TILE_SIZE
+    center_row = level.player_sprite.rect.centery // TILE_SIZE
+    open_cells = [(col, row)
+                  for row in range(max(0, center_row - radius), min(grid.rows, center_row + radius + 1))
+                  for col in range(max(0, center_col - radius), min(grid.cols, center_col + radius + 1))
+                  if not grid.is_solid(col, row)]
+    for col, row in level.random.choices(open_cells, k=count):
+        level.spawn_enemy((col * TILE_SIZE + TILE_SIZE // 2, row * TILE_SIZE + TILE_SIZE // 2))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def get_screen():
+    # One display for every run, so cached assets stay valid between them
+    screen = pygame.display.get_surface()
+    if screen is None:
+        pygame.init()
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    return screen
+
+
+def time_ticks(level, screen, ticks, dt):
+    frame_times = []
+    start = time.perf_counter()
+    for _ in range(ticks):
+        frame_start = time.perf_counter()
+        level.run(dt)
+        level.present()
+        frame_times.append(time.perf_counter() - frame_start)
+        profiler.end_frame()
+    elapsed = time.perf_counter() - start
+
+    frame_times.sort()
+    return {
+        'ticks': ticks,
+        'ticks_per_sec': ticks / elapsed if elapsed > 0 else 0.0,
+        'p50_ms': percentile(frame_times, 0.50) * 1000,
+        'p95_ms': percentile(frame_times, 0.95) * 1000,
+        'p99_ms': percentile(frame_times, 0.99) * 1000,
+        'enemies': len(level.enemy_sprites),
+        'projectiles': len(level.projectiles),
+    }
+
+
+def run_scenario(name, ticks=1000, dt=1 / SIM_RATE, seed=0, controls=None):
+    """Run one scenario as fast as possible at a fixed dt and return its timing stats."""
+    from level import Level
+
+    config = SCENARIOS[name]
+    random.seed(seed)  # Effects use the global RNG
+
+    screen = get_screen()
+    world = None
+    if 'world' in config:
+        world = ChunkedWorld(config['world'], config['world'], seed=seed)
+    if controls is None:
+        controls = ScriptedControls([] if config.get('still') else PATROL)
+    level = Level(screen, controls=controls, seed=seed, world=world)
+
+    # Keep the player alive so every scenario measures the same amount of work
+    player = level.player_sprite
+    player.max_health = player.health = 10 ** 9
+    if 'weapon_cooldown' in config:
+        player.weapon.cooldown = config['weapon_cooldown']
+    if 'projectile_lifespan' in config:
+        player.weapon.lifespan = config['projectile_lifespan']
+    for preset in config.get('weapons', ())[1:]:  # The player already has the first one
+        player.add_weapon(preset)
+    if not config.get('spawning', True):
+        level.wave_director = None
+    populate(level, config['enemies'])
+
+    return {'scenario': name, 'seed': seed, **time_ticks(level, screen, ticks, dt)}
+
+
+def run_replay(path):
+    """Play a recorded session back unchanged, one simulation step and frame per recorded tick."""
+    from level import Level
+
+    recording = Recording.load(path)
+    random.seed(recording.seed)
+    screen = get_screen()
+    world = None
+    if recording.world:
+        world = ChunkedWorld(recording.world, recording.world, seed=recording.seed)
+    level = Level(screen, controls=recording.controls(), seed=recording.seed, world=world)
+    result = time_ticks(level, screen, recording.ticks, 1 / recording.sim_rate)
+    return {'scenario': os.path.basename(path), 'seed': recording.seed, **result}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless fixed-dt benchmark for Level.run")
+    parser.add_argument('--scenario', choices=[*SCENARIOS, 'all'], default='all')
+    parser.add_argument('--ticks', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dt', type=float, default=1 / SIM_RATE)
+    parser.add_argument('--replay', help="time a session recorded with main.py --record instead")
+    parser.add_argument('--json', help="also write the results to this file")
+    parser.add_argument('--trace', help="record per-stage timings to this .json or .csv file")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        profiler.start_trace()
+
+    if args.replay:
+        runs = [lambda: run_replay(args.replay)]
+    else:
+        names = list(SCENARIOS) if args.scenario == 'all' else [args.scenario]
+        runs = [lambda name=name: run_scenario(name, ticks=args.ticks, dt=args.dt, seed=args.seed)
+                for name in names]
+
+    results = []
+    print(f"{'scenario':<18}{'ticks/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'enemies':>9}")
+    for run in runs:
+        result = run()
+        results.append(result)
+        print(f"{result['scenario']:<18}{result['ticks_per_sec']:>10.1f}{result['p50_ms']:>9.2f}"
+              f"{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}{result['enemies']:>9}")
+
+    pygame.quit()
+
+    if args.trace:
+        profiler.dump(args.trace)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
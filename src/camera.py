@@ -1,7 +1,9 @@
 import pygame
+from settings import BG_COLOR, DIRTY_RECTS, DIRTY_RECT_LIMIT
+from profiler import profiler
 
 class CameraGroup(pygame.sprite.LayeredUpdates):
-    def __init__(self, player):
+    def __init__(self, player, y_sorted_layers=(2,), dirty_rects=DIRTY_RECTS):
         super().__init__()
         self.display_surface = pygame.display.get_surface()
         self.player = player
@@ -10,11 +12,146 @@ class CameraGroup(pygame.sprite.LayeredUpdates):
         # Optional: center offset for smooth scrolling
         self.half_w = self.display_surface.get_size()[0] // 2
         self.half_h = self.display_surface.get_size()[1] // 2
-    def draw(self):
-        self.offset.x = self.player.rect.centerx - self.half_w
-        self.offset.y = self.player.rect.centery - self.half_h
-
-        # Draw all sprites, ordered by layer then Y-axis for depth
-        for sprite in sorted(self.sprites(), key=lambda s: (self.get_layer_of_sprite(s), s.rect.centery)):
-            offset_pos = sprite.rect.topleft - self.offset
-            self.display_surface.blit(sprite.image, offset_pos)
+
+        # Screen-sized rect in world space, moved with the offset every frame
+        self.viewport = pygame.Rect((0, 0), self.display_surface.get_size())
+
+        # Pre-rendered static terrain drawn under every layer (set by Level)
+        self.terrain = None
+        # Batched death particles drawn over every layer (set by Level)
+        self.particles = None
+
+        # Sprites bucketed per layer (dicts keep insertion order and remove in O(1))
+        self.layer_buckets = {}
+        # Only these layers need depth ordering by rect.centery
+        self.y_sorted_layers = set(y_sorted_layers)
+
+        # Dirty-rect mode: while the viewport stays put, the background (fill and terrain) is kept
+        # in a screen-sized copy, and each frame only the screen rects drawn over last frame are
+        # restored from it and pushed to the display along with this frame's
+        self.dirty_rects = dirty_rects
+        self.background = None  # Valid for background_viewport only
+        self.background_viewport = None
+        self.last_viewport = None
+        self.drawn = []  # Screen rects drawn over this frame (sprites, particles, HUD)
+        self.restored = None  # Last frame's drawn rects, restored this frame; None after a full redraw
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        # New or reused sprites start without motion to interpolate
+        sprite.previous_topleft = sprite.rect.topleft
+        self._bucket_add(sprite, self.get_layer_of_sprite(sprite))
+
+    def remove_internal(self, sprite):
+        layer = self.get_layer_of_sprite(sprite)
+        super().remove_internal(sprite)
+        self._bucket_remove(sprite, layer)
+
+    def change_layer(self, sprite, new_layer):
+        self._bucket_remove(sprite, self.get_layer_of_sprite(sprite))
+        super().change_layer(sprite, new_layer)
+        self._bucket_add(sprite, new_layer)
+
+    def _bucket_add(self, sprite, layer):
+        if layer not in self.layer_buckets:
+            self.layer_buckets[layer] = {}
+            # Keep buckets in layer order so draw can walk them directly
+            self.layer_buckets = dict(sorted(self.layer_buckets.items()))
+        self.layer_buckets[layer][sprite] = None
+
+    def _bucket_remove(self, sprite, layer):
+        bucket = self.layer_buckets.get(layer)
+        if bucket is not None:
+            bucket.pop(sprite, None)
+
+    def snapshot(self):
+        # Called before each simulation step
+        for sprite in self._spritelist:
+            sprite.previous_topleft = sprite.rect.topleft
+
+    def draw(self, alpha=1.0):
+        # offset follows the player's current rect (HUD elements are placed with it); the
+        # viewport follows where the player is drawn, alpha of the way through the last step
+        player = self.player
+        self.offset.x = player.rect.centerx - self.half_w
+        self.offset.y = player.rect.centery - self.half_h
+        interpolate = alpha < 1.0
+        if interpolate:
+            prev_x, prev_y = player.previous_topleft
+            self.viewport.topleft = (round(self.offset.x + (prev_x - player.rect.x) * (1 - alpha)),
+                                     round(self.offset.y + (prev_y - player.rect.y) * (1 - alpha)))
+        else:
+            self.viewport.topleft = (self.offset.x, self.offset.y)
+
+        viewport = self.viewport
+        offset_x, offset_y = viewport.topleft
+        surface = self.display_surface
+        blit = surface.blit
+
+        if self.dirty_rects and viewport.topleft == self.last_viewport:
+            self.restore_background()
+        else:
+            self.restored = None
+            surface.fill(BG_COLOR)
+            if self.terrain:
+                self.terrain.draw(surface, viewport)
+        self.last_viewport = viewport.topleft
+        drawn = self.drawn = []
+        if self.dirty_rects:
+            blit = lambda image, pos: drawn.append(surface.blit(image, pos))
+
+        # Draw layer by layer, y-sorting only where depth matters and skipping off-screen sprites
+        for layer, bucket in self.layer_buckets.items():
+            if layer in self.y_sorted_layers:
+                # Cull before sorting: a big horde is mostly off screen
+                sprites = [sprite for sprite in bucket if viewport.colliderect(sprite.rect)]
+                sprites.sort(key=lambda s: s.rect.centery)
+            else:
+                sprites = bucket
+
+            for sprite in sprites:
+                rect = sprite.rect
+                if viewport.colliderect(rect):
+                    if interpolate:
+                        prev_x, prev_y = sprite.previous_topleft
+                        blit(sprite.image, (round(prev_x + (rect.x - prev_x) * alpha) - offset_x,
+                                            round(prev_y + (rect.y - prev_y) * alpha) - offset_y))
+                    else:
+                        blit(sprite.image, (rect.x - offset_x, rect.y - offset_y))
+
+        if self.particles:
+            area = self.particles.draw(surface, viewport)
+            if area:
+                drawn.append(area)
+
+        # Nothing reads the removed-sprite rects since draw is overridden, so don't let them pile up
+        self.lostsprites.clear()
+
+    def restore_background(self):
+        # The camera has stopped: keep a copy of what is under the sprites, made once per stop
+        surface = self.display_surface
+        if self.background is None or self.background_viewport != self.viewport.topleft:
+            if self.background is None:
+                self.background = pygame.Surface(surface.get_size()).convert()
+                profiler.increment('surface allocs')
+            self.background.fill(BG_COLOR)
+            if self.terrain:
+                self.terrain.draw(self.background, self.viewport)
+            self.background_viewport = self.viewport.topleft
+
+        self.restored = self.drawn
+        for rect in self.restored:
+            surface.blit(self.background, rect, rect)
+
+    def mark(self, rect):
+        """Record a screen rect drawn over after draw() (HUD, overlays), so it gets pushed to
+        the display and cleaned up next frame."""
+        if rect:
+            self.drawn.append(rect)
+
+    def present(self):
+        # Push the frame: everything after a full redraw, else only what changed since last frame
+        if self.restored is None or len(self.restored) + len(self.drawn) > DIRTY_RECT_LIMIT:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.restored + self.drawn)
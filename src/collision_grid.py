@@ -0,0 +1,82 @@
+from settings import TILE_SIZE
+
+
+class CollisionGrid:
+    def __init__(self, cells, cols, rows, solid_cells=b"XC"):
+        # cells holds cols * rows cell characters, row-major (MapData.cells, possibly a mapped view)
+        self.rows = rows
+        self.cols = cols
+        # One byte per map cell, 1 = blocks movement; translated a row at a time
+        flags = bytes(1 if value in solid_cells else 0 for value in range(256))
+        self.solid = [bytearray(cells[row * cols:(row + 1) * cols]).translate(flags) for row in range(rows)]
+
+    def is_solid(self, col, row):
+        # Anything outside the map counts as a wall
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.solid[row][col] == 1
+        return True
+
+    def window(self, left, top, cols, rows):
+        """Solid flags (1 = solid, anything outside the map included) of a cols x rows block
+        of cells starting at (left, top), as one row-major bytearray."""
+        out = bytearray(b'\x01') * (cols * rows)
+        first_col = max(0, left)
+        last_col = min(self.cols, left + cols)
+        if first_col >= last_col:
+            return out
+        for row in range(max(0, top), min(self.rows, top + rows)):
+            start = (row - top) * cols + first_col - left
+            out[start:start + last_col - first_col] = self.solid[row][first_col:last_col]
+        return out
+
+    def any_solid(self, first_col, first_row, last_col, last_row):
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                if self.is_solid(col, row):
+                    return True
+        return False
+
+    def move(self, rect, dx, dy):
+        """Move rect in place by (dx, dy), stopping flush against solid cells.
+
+        Each axis is swept separately in steps shorter than a tile so fast
+        movement or long frames can't tunnel through a wall.
+        """
+        self.sweep_x(rect, dx)
+        self.sweep_y(rect, dy)
+
+    def sweep_x(self, rect, dx):
+        steps = int(abs(dx) // (TILE_SIZE // 2)) + 1
+        step = dx / steps
+        for _ in range(steps):
+            rect.x += step
+            first_row = rect.top // TILE_SIZE
+            last_row = (rect.bottom - 1) // TILE_SIZE
+            if step > 0:
+                col = (rect.right - 1) // TILE_SIZE
+                if self.any_solid(col, first_row, col, last_row):
+                    rect.right = col * TILE_SIZE
+                    return
+            elif step < 0:
+                col = rect.left // TILE_SIZE
+                if self.any_solid(col, first_row, col, last_row):
+                    rect.left = (col + 1) * TILE_SIZE
+                    return
+
+    def sweep_y(self, rect, dy):
+        steps = int(abs(dy) // (TILE_SIZE // 2)) + 1
+        step = dy / steps
+        for _ in range(steps):
+            rect.y += step
+            first_col = rect.left // TILE_SIZE
+            last_col = (rect.right - 1) // TILE_SIZE
+            if step > 0:
+                row = (rect.bottom - 1) // TILE_SIZE
+                if self.any_solid(first_col, row, last_col, row):
+                    rect.bottom = row * TILE_SIZE
+                    return
+            elif step < 0:
+                row = rect.top // TILE_SIZE
+                if self.any_solid(first_col, row, last_col, row):
+                    rect.top = (row + 1) * TILE_SIZE
+                    return
@@ -0,0 +1,50 @@
+import pygame
+
+# Movement buttons packed into one small int per tick
+UP = 1
+DOWN = 2
+LEFT = 4
+RIGHT = 8
+
+
+class KeyboardControls:
+    def __init__(self):
+        self.buttons = 0
+
+    def poll(self):
+        # Read the live keyboard once per tick so every reader sees the same state
+        keys = pygame.key.get_pressed()
+        buttons = 0
+        if keys[pygame.K_w] or keys[pygame.K_UP]:
+            buttons |= UP
+        if keys[pygame.K_s] or keys[pygame.K_DOWN]:
+            buttons |= DOWN
+        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
+            buttons |= LEFT
+        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
+            buttons |= RIGHT
+        self.buttons = buttons
+
+
+class ScriptedControls:
+    def __init__(self, script, loop=True):
+        # script is a list of (ticks, buttons) steps, e.g. [(60, RIGHT), (30, UP | LEFT)]
+        self.script = script
+        self.loop = loop
+        self.buttons = 0
+        self.step = 0
+        self.ticks_left = script[0][0] if script else 0
+
+    def poll(self):
+        if self.step >= len(self.script):
+            self.buttons = 0
+            return
+
+        self.buttons = self.script[self.step][1]
+        self.ticks_left -= 1
+        if self.ticks_left <= 0:
+            self.step += 1
+            if self.step >= len(self.script) and self.loop:
+                self.step = 0
+            if self.step < len(self.script):
+                self.ticks_left = self.script[self.step][0]
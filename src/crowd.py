@@ -0,0 +1,65 @@
+import math
+from settings import SEPARATION_RADIUS, SEPARATION_NEIGHBORS
+
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))  # Spreads exactly stacked enemies evenly around a circle
+
+
+class CrowdGrid:
+    """Enemy centers bucketed by cell once per tick, for separation.
+
+    Each enemy is pushed away from the enemies within `radius` in the 3x3 cells around it,
+    looking at no more than `neighbors` of them per cell, so a tick costs the same per enemy
+    however dense the horde gets.
+    """
+
+    def __init__(self, radius=SEPARATION_RADIUS, neighbors=SEPARATION_NEIGHBORS):
+        self.radius = radius  # Also the cell size
+        self.neighbors = neighbors
+        self.cells = {}  # (cell_x, cell_y) -> list of (sprite, x, y)
+        self.ranks = {}  # sprite -> index in its cell's list
+
+    def rebuild(self, sprites):
+        self.cells.clear()
+        self.ranks.clear()
+        size = self.radius
+        cells = self.cells
+        for sprite in sprites:
+            x, y = sprite.rect.center
+            cell = cells.get((x // size, y // size))
+            if cell is None:
+                cell = cells[(x // size, y // size)] = []
+            self.ranks[sprite] = len(cell)
+            cell.append((sprite, x, y))
+
+    def push(self, sprite):
+        """Separation direction for sprite: summed (1 - distance / radius) pushes, unnormalized."""
+        x, y = sprite.rect.center
+        size = self.radius
+        cell_x, cell_y = x // size, y // size
+        rank = self.ranks.get(sprite, 0)
+        push_x = push_y = 0.0
+        for cy in (cell_y - 1, cell_y, cell_y + 1):
+            for cx in (cell_x - 1, cell_x, cell_x + 1):
+                cell = self.cells.get((cx, cy))
+                if not cell:
+                    continue
+                # Each enemy samples a different window of a crowded cell, starting after itself
+                count = len(cell)
+                samples = min(count, self.neighbors)
+                scale = count / samples  # Each sample stands in for this many enemies
+                for k in range(samples):
+                    other, other_x, other_y = cell[(rank + 1 + k) % count]
+                    if other is sprite:
+                        continue
+                    dx = x - other_x
+                    dy = y - other_y
+                    distance = math.hypot(dx, dy)
+                    if distance >= size:
+                        continue
+                    if distance == 0:
+                        angle = (rank - k) * GOLDEN_ANGLE
+                        dx, dy, distance = math.cos(angle), math.sin(angle), 1
+                    weight = scale * (1 - distance / size) / distance
+                    push_x += dx * weight
+                    push_y += dy * weight
+        return push_x, push_y
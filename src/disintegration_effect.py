@@ -1,11 +1,17 @@
 import pygame
 import random
+from pool import Pool, PooledSprite
+from profiler import profiler
 
-class DisintegrationEffect(pygame.sprite.Sprite):
+class DisintegrationEffect(PooledSprite):
     def __init__(self, sprite, duration=1.0):
         super().__init__()
+        self.reset(sprite, duration)
+
+    def reset(self, sprite, duration=1.0):
         self.original_image = sprite.image.copy()
         self.image = self.original_image.copy()
+        profiler.increment('surface allocs', 2)
         self.rect = self.image.get_rect(center=sprite.rect.center)
         self.duration = duration
         self.elapsed_time = 0
@@ -41,6 +47,7 @@ class DisintegrationEffect(pygame.sprite.Sprite):
         
         # Create a new surface for the effect
         self.image = pygame.Surface(self.original_image.get_size(), pygame.SRCALPHA)
+        profiler.increment('surface allocs')
         
         # Update and draw particles
         for particle in self.particles:
@@ -62,4 +69,17 @@ class DisintegrationEffect(pygame.sprite.Sprite):
         
         # Kill the effect when it's done
         if progress >= 1.0:
-            self.kill() 
\ No newline at end of file
+            self.kill()
+
+
+# Shared by everything that dies; finished effects are reused instead of reallocated
+effect_pool = Pool(DisintegrationEffect)
+
+
+def disintegrate(sprite, visible_sprites, duration):
+    """Break sprite apart, through the shared particle system when the camera group has one."""
+    particles = visible_sprites.particles
+    if particles:
+        particles.emit_from_image(sprite.image, sprite.rect, duration)
+    else:
+        visible_sprites.add(effect_pool.acquire(sprite, duration=duration), layer=3)
@@ -1,105 +1,119 @@
 import pygame
+from collections import deque
+from assets import assets
 from projectile import Projectile
 
+EFFECT_SHEET = "assets/sprites/effects/blue_effects.png"
+
+EFFECT_PROPERTIES = {
+    "ice_shuriken": {
+        "row": 4,
+        "frames": 2,
+        "size": (16, 16),
+        "animation_speed": 14,
+        "start_row": 0,
+        "start_col": 7
+    },
+    "ice_loop": {
+        "row": 8,
+        "frames": 2,
+        "size": (16, 16),
+        "animation_speed": 7,
+        "start_row": 0,
+        "start_col": 7
+    },
+    "ice_flame": {
+        "row": 0,
+        "frames": 3,
+        "size": (16, 16),
+        "animation_speed": 15,
+        "start_row": 0
+    },
+    "ice_kunai": {
+        "row": 4,
+        "frames": 3,
+        "size": (16, 16),
+        "animation_speed": 3,
+        "start_row": 0
+    },
+    "ice_spark": {
+        "row": 7,
+        "frames": 3,
+        "size": (16, 16),
+        "animation_speed": 15,
+        "start_row": 0
+    },
+    "fading_fire": {
+        "row": 0,
+        "frames": 3,
+        "size": (16, 16),
+        "animation_speed": 2,
+        "start_col": 10,
+        "start_row": 0
+    },
+    "hadouken": {
+        "row": 1,
+        "frames": 2,
+        "size": (16, 16),
+        "animation_speed": 15,
+        "start_col": 10,
+        "start_row": 0
+    },
+    "blue_orb": {
+        "row": 7,
+        "frames": 3,
+        "size": (16, 16),
+        "animation_speed": 15,
+        "start_col": 10,
+        "start_row": 0
+    },
+    # Multi-row effects
+    "large_blue_wave": {
+        "row": 1,
+        "frames": 4,
+        "size": (16, 32),  # Double height
+        "animation_speed": 15,
+        "multi_row": True,
+        "start_col": 10,
+        "start_row": 1
+    },
+    "large_fire_orb": {
+        "row": 10,
+        "frames": 3,
+        "size": (16, 32),  # Double height
+        "animation_speed": 15,
+        "multi_row": True,
+        "start_col": 10,
+        "start_row": 4
+    }
+}
+
+
 class EffectProjectile(Projectile):
     def __init__(self, pos, direction, speed, lifespan, effect_type="blue_orb", damage=10, weapon_type="effect"):
-        # Load the effect sprite sheet
-        self.effect_sheet = pygame.image.load("assets/sprites/effects/blue_effects.png").convert_alpha()
-        
-        self.effect_properties = {
-            "ice_shuriken": {
-                "row": 4,
-                "frames": 2,
-                "size": (16, 16),
-                "animation_speed": 14,
-                "start_row": 0,
-                "start_col": 7
-            },
-            "ice_loop": {
-                "row": 8,
-                "frames": 2,
-                "size": (16, 16),
-                "animation_speed": 7,
-                "start_row": 0,
-                "start_col": 7
-            },
-            "ice_flame": {
-                "row": 0,
-                "frames": 3,
-                "size": (16, 16),
-                "animation_speed": 15,
-                "start_row": 0
-            },
-            "ice_kunai": {
-                "row": 4,
-                "frames": 3,
-                "size": (16, 16),
-                "animation_speed": 3,
-                "start_row": 0
-            },
-            "ice_spark": {
-                "row": 7,
-                "frames": 3,
-                "size": (16, 16),
-                "animation_speed": 15,
-                "start_row": 0
-            },
-            "fading_fire": {
-                "row": 0,
-                "frames": 3,
-                "size": (16, 16),
-                "animation_speed": 2,
-                "start_col": 10,
-                "start_row": 0
-            },
-            "hadouken": {
-                "row": 1,
-                "frames": 2,
-                "size": (16, 16),
-                "animation_speed": 15,
-                "start_col": 10,
-                "start_row": 0
-            },
-            "blue_orb": {
-                "row": 7,
-                "frames": 3,
-                "size": (16, 16),
-                "animation_speed": 15,
-                "start_col": 10,
-                "start_row": 0
-            },
-            # Multi-row effects
-            "large_blue_wave": {
-                "row": 1,
-                "frames": 4,
-                "size": (16, 32),  # Double height
-                "animation_speed": 15,
-                "multi_row": True,
-                "start_col": 10,
-                "start_row": 1
-            },
-            "large_fire_orb": {
-                "row": 10,
-                "frames": 3,
-                "size": (16, 32),  # Double height
-                "animation_speed": 15,
-                "multi_row": True,
-                "start_col": 10,
-                "start_row": 4
-            }
-        }
-        
+        # Skip Projectile.__init__, whose reset() call takes an image rather than an effect type
+        pygame.sprite.Sprite.__init__(self)
+        self.batch = None
+        self.slot = -1
+        self.max_trail_length = 5
+        self.trail_positions = deque(maxlen=self.max_trail_length)
+        self.reset(pos, direction, speed, lifespan, effect_type, damage, weapon_type)
+
+    def reset(self, pos, direction, speed, lifespan, effect_type="blue_orb", damage=10, weapon_type="effect"):
         # Get properties for the selected effect
-        props = self.effect_properties[effect_type]
+        props = EFFECT_PROPERTIES[effect_type]
+        self.effect_type = effect_type
         
-        # Load the first frame as the initial image
-        initial_frame = self.load_frame(props["row"], 0, props["size"], props.get("start_col", 0), props.get("multi_row", False), props.get("start_row", 0))
+        # Load all frames for this effect (cached after the first shot)
+        self.source_frames = [
+            self.load_frame(props["row"], i, props["size"], props.get("start_col", 0), props.get("multi_row", False), props.get("start_row", 0))
+            for i in range(props["frames"])
+        ]
         
-        # Initialize the base projectile with the first frame
-        super().__init__(pos, direction, speed, lifespan, initial_frame, damage, weapon_type)
+        # Initialize the base projectile, which picks the frames rotated towards direction
+        super().reset(pos, direction, speed, lifespan, self.source_frames[0], damage, weapon_type)
         
         # Animation properties
-        self.effect_type = effect_type
         self.frame_index = 0
         self.animation_speed = props["animation_speed"]
         self.frames = props["frames"]
@@ -107,40 +121,25 @@ class EffectProjectile(Projectile):
         self.start_col = props.get("start_col", 0)
         self.start_row = props.get("start_row", 0)
         self.multi_row = props.get("multi_row", False)
-        
-        # Load all frames for this effect
-        self.animation_frames = [
-            self.load_frame(props["row"], i, props["size"], self.start_col, self.multi_row, self.start_row)
-            for i in range(props["frames"])
-        ]
+
+    def oriented_frames(self):
+        # One rotation set per effect type, covering every animation frame
+        return assets.rotated(self.effect_type, self.source_frames).frames(self.direction)
 
     def load_frame(self, row, frame_index, size, start_col=0, multi_row=False, start_row=0):
         """Load a single frame from the sprite sheet."""
         x = (start_col + frame_index) * size[0]
         y = (start_row + row) * size[1]
-        
-        if multi_row:
-            # For multi-row effects, combine two rows
-            frame1 = self.effect_sheet.subsurface(pygame.Rect(x, y, size[0], size[1]//2))
-            frame2 = self.effect_sheet.subsurface(pygame.Rect(x, y + size[1]//2, size[0], size[1]//2))
-            
-            # Create a new surface to combine the frames
-            combined_frame = pygame.Surface(size, pygame.SRCALPHA)
-            combined_frame.blit(frame1, (0, 0))
-            combined_frame.blit(frame2, (0, size[1]//2))
-            return combined_frame
-        else:
-            rect = pygame.Rect(x, y, size[0], size[1])
-            return self.effect_sheet.subsurface(rect)
 
-    def update(self, dt):
+        # Multi-row effects span two stacked rows, which is one contiguous rect of the full size
+        rect = pygame.Rect(x, y, size[0], size[1])
+        return assets.get(EFFECT_SHEET, rect)
+
+    def advance(self, dt):
         # Update animation
         self.frame_index += self.animation_speed * dt
         if self.frame_index >= self.frames:
             self.frame_index = 0
         
-        # Update the current frame
-        self.image = self.animation_frames[int(self.frame_index)]
-        
-        # Call the parent class update method
-        super().update(dt) 
\ No newline at end of file
+        # The parent class shows the frame, rotated towards the direction of travel
+        super().advance(dt) 
\ No newline at end of file
@@ -1,16 +1,35 @@
 import pygame
-from settings import TILE_SIZE
+from settings import TILE_SIZE, SEPARATION_WEIGHT
+from assets import assets, AnimationSet
+from pool import PooledSprite
+from lod import NEAR
 import os
 
 SPRITE_SIZE = 32  # Match actual frame size
+FLASH_TINTS = [(255, 255, 255, 128)]  # Flash colors (with alpha) whose frames are pre-rendered
 
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, pos, player, visible_sprites, enemy_type='blob'):
+# Every frame variant per enemy type, shared by all enemies of that type
+animation_sets = {}
+
+class Enemy(PooledSprite):
+    def __init__(self, pos, player, visible_sprites, enemy_type='blob', flow_field=None, xp_gems=None, crowd=None):
         super().__init__()
+        self.swarm = None  # Set while a batched EnemySwarm simulates this enemy
+        self.slot = -1  # Row in the swarm's arrays
+        self.enemy_type = None
+        self.animation_set = None
+        self.reset(pos, player, visible_sprites, enemy_type, flow_field, xp_gems, crowd)
+
+    def reset(self, pos, player, visible_sprites, enemy_type='blob', flow_field=None, xp_gems=None, crowd=None):
+        # Back to a freshly spawned state; also used when a pooled enemy is reused
         self.player = player
-        self.enemy_type = enemy_type
         self.visible_sprites = visible_sprites  # Store reference to visible_sprites
-        
+        self.flow_field = flow_field  # Shared path towards the player, if the level has one
+        self.xp_gems = xp_gems  # Where the XP gem goes on death
+        self.crowd = crowd  # CrowdGrid that keeps enemies from stacking up
+        type_changed = enemy_type != self.enemy_type
+        self.enemy_type = enemy_type
+
         # Load enemy stats based on type
         self.stats = self.get_enemy_stats()
         
@@ -30,18 +49,22 @@ class Enemy(pygame.sprite.Sprite):
         self.knockback_friction = 0.4  # Reduced friction for longer knockback
         self.knockback_strength = 300  # Increased knockback force
         
-        # Load animations
-        self.animations = {
-            'idle': self.load_animation('blob_spritesheet.png', 0, 2),
-            'walk': self.load_animation('blob_spritesheet.png', 1, 4),
-            'hurt': self.load_animation('blob_spritesheet.png', 2, 1),
-            'attack': self.load_animation('blob_spritesheet.png', 3, 3)
-        }
+        # Load animations (kept when a pooled enemy comes back as the same type)
+        if type_changed:
+            self.animation_set = animation_sets.get(enemy_type)
+            if self.animation_set is None:
+                self.animation_set = animation_sets[enemy_type] = AnimationSet({
+                    'idle': self.load_animation('blob_spritesheet.png', 0, self.stats['idle_frames']),
+                    'walk': self.load_animation('blob_spritesheet.png', 1, self.stats['walk_frames']),
+                    'hurt': self.load_animation('blob_spritesheet.png', 2, self.stats['hurt_frames']),
+                    'attack': self.load_animation('blob_spritesheet.png', 3, self.stats['attack_frames'])
+                }, tints=FLASH_TINTS)
         
         # Set initial state
         self.status = 'idle'
-        self.image = self.animations[self.status][self.frame_index]
+        self.image = self.animation_set.frames(self.status)[self.frame_index]
         self.rect = self.image.get_rect(center=pos)
+        self.position = pygame.Vector2(self.rect.center)  # Exact center; rect is the rounded copy
         
         # Movement
         self.speed = self.stats['speed']
@@ -51,6 +74,10 @@ class Enemy(pygame.sprite.Sprite):
         self.is_hurt = False
         self.hurt_timer = 0
 
+        # Update detail, managed by the level's EnemyLOD
+        self.lod = NEAR
+        self.lod_time = None  # LOD clock time of the last check
+
     def get_enemy_stats(self):
         # Define stats for different enemy types
         stats = {
@@ -64,15 +91,46 @@ class Enemy(pygame.sprite.Sprite):
                 'idle_frames': 2,
                 'walk_frames': 4,
                 'hurt_frames': 1,
-                'attack_frames': 3
+                'attack_frames': 3,
+                'size': TILE_SIZE,
+                'xp': 1
+            },
+            'runner': {
+                'health': 10,
+                'speed': 140,
+                'damage': 5,
+                'attack_range': 40,
+                'attack_cooldown': 0.6,
+                'animation_speed': 12,
+                'idle_frames': 2,
+                'walk_frames': 4,
+                'hurt_frames': 1,
+                'attack_frames': 3,
+                'size': TILE_SIZE * 3 // 4,
+                'xp': 1
+            },
+            'brute': {
+                'health': 80,
+                'speed': 50,
+                'damage': 25,
+                'attack_range': 70,
+                'attack_cooldown': 1.5,
+                'animation_speed': 6,
+                'idle_frames': 2,
+                'walk_frames': 4,
+                'hurt_frames': 1,
+                'attack_frames': 3,
+                'size': TILE_SIZE * 3 // 2,
+                'xp': 5
             }
             # Add more enemy types here as needed
         }
         return stats.get(self.enemy_type, stats['blob'])  # Default to blob if type not found
 
     def load_animation(self, filename, row, num_frames):
+        # Frame sources as (path, rect, scale) for AnimationSet
         path = os.path.join('assets', 'sprites', filename)
-        sprite_sheet = pygame.image.load(path).convert_alpha()
+        sprite_sheet = assets.get(path)
         frames = []
         for i in range(num_frames):
             x = i * SPRITE_SIZE
@@ -85,14 +143,19 @@ class Enemy(pygame.sprite.Sprite):
                 print(f"[ERROR] Tried to extract frame at ({x}, {y}) — outside sprite sheet!")
                 continue
 
-            frame = sprite_sheet.subsurface(rect)
-            frame = pygame.transform.scale(frame, (TILE_SIZE, TILE_SIZE))  # Optional scaling
-            frames.append(frame)
+            size = self.stats['size']
+            frames.append((path, rect, (size, size)))  # Scaled per enemy type
 
         return frames
 
     def get_direction_to_player(self):
-        # Calculate direction vector to player
+        # Follow the shared flow field around walls when there is a path
+        if self.flow_field:
+            flow = self.flow_field.direction_from(self.rect.center)
+            if flow:
+                return pygame.Vector2(flow)
+
+        # Otherwise (same cell as the player, or no field) head straight for the player
         direction = pygame.Vector2(
             self.player.rect.centerx - self.rect.centerx,
             self.player.rect.centery - self.rect.centery
@@ -107,11 +170,11 @@ class Enemy(pygame.sprite.Sprite):
     def move_towards_player(self, dt):
         # Apply knockback movement if there is any
         if self.knockback_velocity.length() > 1:
-            self.rect.x += self.knockback_velocity.x * dt
-            self.rect.y += self.knockback_velocity.y * dt
+            self.slide(self.knockback_velocity * dt)
+            self.rect.center = (round(self.position.x), round(self.position.y))
             
-            # Apply friction to knockback
-            self.knockback_velocity *= self.knockback_friction
+            # Apply friction to knockback (knockback_friction is per 1/60 s, so any step size agrees)
+            self.knockback_velocity *= self.knockback_friction ** (dt * 60)
             
             # If knockback is very small, reset it
             if self.knockback_velocity.length() < 1:
@@ -119,15 +182,35 @@ class Enemy(pygame.sprite.Sprite):
                 self.is_hurt = False
             return
 
-        # Normal movement towards player
+        # Normal movement towards player, spreading out from the enemies around this one
         direction = self.get_direction_to_player()
+        if self.crowd:
+            direction += pygame.Vector2(self.crowd.push(self)) * SEPARATION_WEIGHT
+            if direction.length() > 0:
+                direction = direction.normalize()
         
         # Update facing direction
         self.facing_left = direction.x < 0
         
         # Move towards player
-        self.rect.x += direction.x * self.speed * dt
-        self.rect.y += direction.y * self.speed * dt
+        self.slide(direction * self.speed * dt)
+        self.rect.center = (round(self.position.x), round(self.position.y))
+
+    def slide(self, offset):
+        # Move the center an axis at a time, dropping the part of offset that would carry it into a
+        # solid cell (separation can point straight at a wall); cells are those of the rounded
+        # center rect gets, and the flow field's grid is the map's
+        grid = self.flow_field.grid if self.flow_field else None
+        col, row = round(self.position.x) // TILE_SIZE, round(self.position.y) // TILE_SIZE
+        x = self.position.x + offset.x
+        new_col = round(x) // TILE_SIZE
+        if not grid or new_col == col or not grid.is_solid(new_col, row):
+            self.position.x = x
+            col = new_col
+        y = self.position.y + offset.y
+        new_row = round(y) // TILE_SIZE
+        if not grid or new_row == row or not grid.is_solid(col, new_row):
+            self.position.y = y
 
     def animate(self, dt):
         # Handle hurt animation
@@ -143,8 +226,9 @@ class Enemy(pygame.sprite.Sprite):
             if self.flash_timer <= 0:
                 self.is_flashing = False
         
-        # Update animation frame
-        frames = self.animations[self.status]
+        # Update animation frame; flipped and flashing variants are pre-rendered lookups
+        tint = (*self.flash_color, 128) if self.is_flashing else None
+        frames = self.animation_set.frames(self.status, self.facing_left, tint)
         self.frame_index += self.animation_speed * dt
         if self.frame_index >= len(frames):
             self.frame_index = 0
@@ -153,24 +237,7 @@ class Enemy(pygame.sprite.Sprite):
             elif self.status == 'attack':
                 self.status = 'idle'
         
-        # Get current frame and flip if needed
-        frame = frames[int(self.frame_index)]
-        if self.facing_left:
-            frame = pygame.transform.flip(frame, True, False)
-            
-        # Apply flash effect if active
-        if self.is_flashing:
-            # Create a copy of the current frame
-            flash_image = frame.copy()
-            # Create a colored surface with the same size
-            flash_surface = pygame.Surface(flash_image.get_size(), pygame.SRCALPHA)
-            flash_surface.fill((*self.flash_color, 128))
-            # Blend the colored surface with the original image
-            flash_image.blit(flash_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-            # Apply the flash effect
-            self.image = flash_image
-        else:
-            self.image = frame
+        self.image = frames[int(self.frame_index)]
 
     def take_damage(self, amount):
         self.health -= amount
@@ -190,20 +257,47 @@ class Enemy(pygame.sprite.Sprite):
         )
         if knockback_direction.length() > 0:
             knockback_direction = knockback_direction.normalize()
-            print(f"Applying knockback: direction={knockback_direction}, strength={self.knockback_strength}")
         
         # Apply knockback
         self.knockback_velocity = knockback_direction * self.knockback_strength
-        print(f"Initial knockback velocity: {self.knockback_velocity}")
+        if self.swarm:
+            self.health = self.swarm.damage(self.slot, amount, self.knockback_velocity)
         
-        if self.health <= 0:
+        if self.health <= 0 and self.alive():
             # Create disintegration effect before killing the enemy
-            from disintegration_effect import DisintegrationEffect
-            effect = DisintegrationEffect(self, duration=0.8)  # Slightly faster than player death
-            self.visible_sprites.add(effect, layer=3)  # Add to visible sprites with high layer
+            from disintegration_effect import disintegrate
+            disintegrate(self, self.visible_sprites, duration=0.8)  # Slightly faster than player death
+            if self.xp_gems:
+                self.xp_gems.drop(self.rect.center, self.stats['xp'])
             self.kill()
 
+    def kill(self):
+        if self.swarm:
+            self.swarm.remove(self)
+        super().kill()
+
+    def sync(self, center, attacking, in_range, facing_left, knockback_settled):
+        # Called by EnemySwarm.update with this enemy's batched results
+        self.rect.center = center
+        self.facing_left = facing_left
+        if attacking:
+            self.status = 'attack'
+        elif not self.is_hurt:  # Only change status if not hurt
+            self.status = 'idle' if in_range else 'walk'
+        if knockback_settled:
+            self.is_hurt = False
+
     def update(self, dt):
+        # Off-screen enemies are left to EnemyLOD, which moves them less often and skips animation
+        if self.lod != NEAR:
+            return
+
+        # Movement, knockback and attack timers are batched by the swarm when there is one
+        if not self.swarm:
+            self.step(dt)
+        self.animate(dt)
+
+    def step(self, dt):
         # Update attack cooldown
         if self.attack_cooldown > 0:
             self.attack_cooldown -= dt
@@ -221,6 +315,4 @@ class Enemy(pygame.sprite.Sprite):
         elif not self.is_hurt:  # Only change status if not hurt
             self.status = 'walk' if distance_to_player > self.attack_range else 'idle'
 
-        # Move and animate
-        self.move_towards_player(dt)
-        self.animate(dt) 
\ No newline at end of file
+        self.move_towards_player(dt) 
\ No newline at end of file
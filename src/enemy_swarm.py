@@ -0,0 +1,223 @@
+from settings import (TILE_SIZE, SEPARATION_RADIUS, SEPARATION_WEIGHT, SEPARATION_NEIGHBORS,
+                      SEPARATION_INTERVAL)
+from crowd import GOLDEN_ANGLE
+from packed_rows import PackedRows, np
+from lod import NEAR
+
+
+class EnemySwarm(PackedRows):
+    # Per-enemy state as (columns, dtype); batched enemies fall back to per-sprite updates without NumPy
+    OWNER = 'swarm'
+    FIELDS = {
+        'pos': (2, float),
+        'knockback': (2, float),
+        'speed': (None, float),
+        'friction': (None, float),
+        'attack_range': (None, float),
+        'attack_cooldown': (None, float),
+        'attack_timer': (None, float),
+        'health': (None, float),
+        'facing_left': (None, bool),
+        'parked': (None, bool),  # Frozen by EnemyLOD while far from the player
+        'near': (None, bool),  # EnemyLOD's NEAR: only these sprites are synced and animated
+        'size': (2, int),  # Sprite rect size, for enemy_rects
+        'push': (2, float),  # Separation from nearby enemies, refreshed every separation_interval ticks
+    }
+
+    def __init__(self, player, flow_field=None, capacity=256, separation_radius=SEPARATION_RADIUS,
+                 separation_weight=SEPARATION_WEIGHT, separation_neighbors=SEPARATION_NEIGHBORS,
+                 separation_interval=SEPARATION_INTERVAL):
+        super().__init__(capacity)
+        self.player = player
+        self.flow_field = flow_field
+        self.separation_radius = separation_radius
+        self.separation_weight = separation_weight  # 0 lets enemies stack freely
+        self.separation_neighbors = separation_neighbors  # Most enemies looked at per neighboring cell
+        self.separation_interval = separation_interval
+        self.separation_phase = 0
+        self.flow_version = None
+        self.flow_next = None  # flow_field.next_cell as an array, refreshed when the field changes
+
+    def add(self, enemy):
+        slot = self.add_row(enemy)
+        stats = enemy.stats
+        self.pos[slot] = enemy.rect.center
+        self.knockback[slot] = 0
+        self.speed[slot] = enemy.speed
+        self.friction[slot] = enemy.knockback_friction
+        self.attack_range[slot] = enemy.attack_range
+        self.attack_cooldown[slot] = stats['attack_cooldown']
+        self.attack_timer[slot] = enemy.attack_cooldown
+        self.health[slot] = enemy.health
+        self.facing_left[slot] = enemy.facing_left
+        self.parked[slot] = False
+        self.near[slot] = enemy.lod == NEAR
+        self.size[slot] = enemy.rect.size
+        self.push[slot] = 0
+
+    def damage(self, slot, amount, knockback):
+        self.health[slot] -= amount
+        self.knockback[slot] = knockback
+        return float(self.health[slot])
+
+    def flow_directions(self, pos, fallback):
+        flow_field = self.flow_field
+        if flow_field is None:
+            return fallback
+
+        if self.flow_version != flow_field.version:
+            self.flow_next = np.asarray(flow_field.next_cell, dtype=np.int64)
+            self.flow_version = flow_field.version
+
+        # Cell coordinates inside the field's window
+        cols = (pos[:, 0] // TILE_SIZE).astype(np.int64) - flow_field.left
+        rows = (pos[:, 1] // TILE_SIZE).astype(np.int64) - flow_field.top
+        inside = (cols >= 0) & (cols < flow_field.cols) & (rows >= 0) & (rows < flow_field.rows)
+        index = np.where(inside, rows * flow_field.cols + cols, 0)
+        next_index = np.where(inside, self.flow_next[index], -1)
+        on_path = (next_index != -1) & (next_index != index)
+
+        # Steer at the next cell's center, like FlowField.direction_from
+        target = np.empty_like(pos)
+        target[:, 0] = (flow_field.left + next_index % flow_field.cols) * TILE_SIZE + TILE_SIZE / 2
+        target[:, 1] = (flow_field.top + next_index // flow_field.cols) * TILE_SIZE + TILE_SIZE / 2
+        steer = target - pos
+        length = np.hypot(steer[:, 0], steer[:, 1])
+        on_path &= length > 0
+        steer /= np.where(length > 0, length, 1)[:, None]
+
+        return np.where(on_path[:, None], steer, fallback)
+
+    def separation(self, pos):
+        """Per-enemy push away from the enemies within separation_radius, like CrowdGrid.push:
+        enemies are sorted by cell once, then each looks at up to separation_neighbors enemies
+        in each of the 3x3 cells around it."""
+        n = len(pos)
+        size = self.separation_radius
+        cells = np.floor(pos / size).astype(np.int64)
+        keys = (cells[:, 0] << 32) + cells[:, 1]
+        order = np.argsort(keys, kind='stable')
+        unique, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n) - np.repeat(starts, counts)
+
+        # Cells around each enemy as (n, 9) keys, looked up in the sorted cell list
+        offsets = np.array([(x << 32) + y for x in (-1, 0, 1) for y in (-1, 0, 1)], dtype=np.int64)
+        neighbor = keys[:, None] + offsets
+        index = np.minimum(np.searchsorted(unique, neighbor), len(unique) - 1)
+        count = np.where(unique[index] == neighbor, counts[index], 0)
+
+        # Up to `samples` enemies per cell, (n, 9, samples); each enemy samples a different window
+        # of a crowded cell, starting after itself, and each sample stands in for count / samples
+        samples = self.separation_neighbors
+        k = np.arange(samples)
+        window = (rank[:, None, None] + 1 + k) % np.maximum(count, 1)[:, :, None]
+        other = order[starts[index][:, :, None] + window]
+        valid = (k < count[:, :, None]) & (other != np.arange(n)[:, None, None])
+        scale = count / np.clip(count, 1, samples)
+
+        # Components kept apart: contiguous gathers and sqrt beat (n, 9, samples, 2) arrays and hypot
+        x = np.ascontiguousarray(pos[:, 0])
+        y = np.ascontiguousarray(pos[:, 1])
+        away_x = x[:, None, None] - x.take(other)
+        away_y = y[:, None, None] - y.take(other)
+        distance = np.sqrt(away_x * away_x + away_y * away_y)
+        stacked = valid & (distance == 0)
+        if stacked.any():
+            # Exactly stacked enemies are spread around a circle instead
+            angle = np.broadcast_to((rank[:, None, None] - k) * GOLDEN_ANGLE, stacked.shape)[stacked]
+            away_x[stacked] = np.cos(angle)
+            away_y[stacked] = np.sin(angle)
+            distance[stacked] = 1
+        valid &= distance < size
+        # (1 - distance / size) per unit of distance, scaled up for sampled cells
+        weight = np.where(valid, scale[:, :, None] * (1 / np.maximum(distance, 1e-9) - 1 / size), 0)
+        return np.stack(((away_x * weight).sum(axis=(1, 2)), (away_y * weight).sum(axis=(1, 2))), axis=1)
+
+    def slide(self, moving, offset):
+        """Move the rows flagged in `moving` by offset an axis at a time, like Enemy.slide, dropping
+        the part of an axis that would carry a center into a solid cell."""
+        rows = np.flatnonzero(moving)
+        grid = self.flow_field.grid if self.flow_field else None
+        for axis in (0, 1):
+            current = self.pos[rows, axis]
+            target = current + offset[:, axis]
+            if grid is not None:
+                # Cells of the rounded centers the sprites get; only the few entering a new cell
+                # this tick need a lookup
+                cell = np.rint(target) // TILE_SIZE
+                crossing = np.flatnonzero(cell != np.rint(current) // TILE_SIZE)
+                if len(crossing):
+                    new = cell[crossing].astype(np.int64).tolist()
+                    other = (np.rint(self.pos[rows[crossing], 1 - axis]) // TILE_SIZE).astype(np.int64).tolist()
+                    cells = zip(new, other) if axis == 0 else zip(other, new)
+                    solid = np.array([grid.is_solid(col, row) for col, row in cells], dtype=bool)
+                    target[crossing[solid]] = current[crossing[solid]]
+            self.pos[rows, axis] = target
+
+    def update(self, dt):
+        n = self.count
+        if n == 0:
+            return
+
+        pos = self.pos[:n]
+        knockback = self.knockback[:n]
+        attack_timer = self.attack_timer[:n]
+        facing_left = self.facing_left[:n]
+        active = ~self.parked[:n]
+
+        # Attack range check against the player, before anyone moves
+        attack_timer -= dt
+        np.maximum(attack_timer, 0, out=attack_timer)
+        to_player = np.asarray(self.player.rect.center, dtype=float) - pos
+        distance = np.hypot(to_player[:, 0], to_player[:, 1])
+        in_range = distance <= self.attack_range[:n]
+        attacking = in_range & (attack_timer <= 0)
+        attack_timer[attacking] = self.attack_cooldown[:n][attacking]
+
+        # Knocked-back enemies slide and slow down instead of chasing
+        knocked = active & (np.hypot(knockback[:, 0], knockback[:, 1]) > 1)
+        self.slide(knocked, knockback[knocked] * dt)
+        knockback[knocked] *= self.friction[:n][knocked, None] ** (dt * 60)  # Friction is per 1/60 s
+        settled = knocked & (np.hypot(knockback[:, 0], knockback[:, 1]) < 1)
+        knockback[settled] = 0
+
+        # Everyone else follows the flow field, or heads straight for the player
+        chasing = active & ~knocked
+        straight = to_player / np.where(distance > 0, distance, 1)[:, None]
+        direction = self.flow_directions(pos, straight)
+        if self.separation_weight:
+            # Spread into a ring around the player instead of collapsing onto one spot; enemies
+            # move a pixel or so per tick, so the push is only recomputed every few ticks
+            if self.separation_phase == 0:
+                self.push[:n] = self.separation(pos)
+            self.separation_phase = (self.separation_phase + 1) % self.separation_interval
+            direction = direction + self.push[:n] * self.separation_weight
+            length = np.hypot(direction[:, 0], direction[:, 1])
+            direction /= np.where(length > 0, length, 1)[:, None]
+        self.slide(chasing, direction[chasing] * (self.speed[:n][chasing, None] * dt))
+        facing_left[chasing] = direction[chasing, 0] < 0
+
+        # Sprites are thin views; push the results back for animation and drawing. Only on-screen
+        # ones need it every tick: EnemyLOD refreshes the others' rects when it checks them
+        rows = np.flatnonzero(self.near[:n])
+        centers = np.rint(pos[rows]).astype(np.int64).tolist()
+        sprites = self.sprites
+        for row, center, attack, near, facing, done in zip(
+                rows.tolist(), centers, attacking[rows].tolist(), in_range[rows].tolist(),
+                facing_left[rows].tolist(), settled[rows].tolist()):
+            sprites[row].sync(center, attack, near, facing, done)
+
+    def sync_rects(self, sprites):
+        # Catches up the rects of sprites that update() hasn't been syncing (not NEAR)
+        slots = [sprite.slot for sprite in sprites]
+        for sprite, center in zip(sprites, np.rint(self.pos[slots]).astype(np.int64).tolist()):
+            sprite.rect.center = center
+
+    def rects(self):
+        """Every enemy's rect as an (n, 4) array of left, top, right, bottom, from its current
+        position (rects of off-screen sprites are only refreshed now and then)."""
+        n = self.count
+        size = self.size[:n]
+        topleft = np.rint(self.pos[:n]).astype(np.int64) - size // 2
+        return np.concatenate((topleft, topleft + size), axis=1)
@@ -0,0 +1,117 @@
+import math
+from collections import deque
+from settings import TILE_SIZE
+
+# Orthogonal steps first so paths prefer straight lines
+NEIGHBOURS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+class FlowField:
+    def __init__(self, collision_grid, radius=None):
+        self.grid = collision_grid
+        self.radius = radius  # Cells searched around the target; None covers the whole grid
+        self.target_cell = None
+        self.version = 0  # Bumped on every rebuild so cached copies know to refresh
+
+        # The window of cells the field covers, in grid cells (the whole grid without a radius)
+        self.left = 0
+        self.top = 0
+        self.cols = collision_grid.cols
+        self.rows = collision_grid.rows
+        # For every cell index in the window ((row - top) * cols + col - left), the index of the
+        # next cell towards the target; -1 for walls and unreachable cells, the cell itself for the target
+        self.next_cell = [-1] * (self.rows * self.cols)
+
+    def update(self, target_pos):
+        # Only re-run the search when the target moves to a different cell
+        cell = (int(target_pos[0]) // TILE_SIZE, int(target_pos[1]) // TILE_SIZE)
+        if cell == self.target_cell:
+            return False
+        self.target_cell = cell
+        self.build(cell)
+        return True
+
+    def build(self, target_cell):
+        grid = self.grid
+        col, row = target_cell
+
+        # Big (streamed) worlds only get a field around the target; far enemies head straight in
+        if self.radius is not None:
+            self.left = max(0, col - self.radius)
+            self.top = max(0, row - self.radius)
+            self.cols = min(grid.cols, col + self.radius + 1) - self.left
+            self.rows = min(grid.rows, row + self.radius + 1) - self.top
+        left, top, cols, rows = self.left, self.top, self.cols, self.rows
+
+        next_cell = [-1] * (rows * cols)
+        self.next_cell = next_cell
+        self.version += 1
+
+        if not (0 <= col - left < cols and 0 <= row - top < rows):
+            return
+
+        # Solid flags of the window plus a one-cell border, which is marked solid so the
+        # search never needs bounds checks; indexes below are into this padded block
+        width = cols + 2
+        solid = grid.window(left - 1, top - 1, width, rows + 2)
+        solid[:width] = solid[-width:] = b'\x01' * width
+        for padded_row in range(1, rows + 1):
+            solid[padded_row * width] = solid[padded_row * width + width - 1] = 1
+
+        start = (row - top + 1) * width + col - left + 1
+        if solid[start]:
+            return
+
+        # (index step, horizontal step, vertical step) per neighbour
+        steps = [(dy * width + dx, dx, dy * width) for dx, dy in NEIGHBOURS]
+        came_from = [-1] * len(solid)
+        came_from[start] = start
+        queue = deque([start])
+
+        # Breadth-first search outwards from the target
+        while queue:
+            index = queue.popleft()
+            for step, step_x, step_y in steps:
+                n_index = index + step
+                if solid[n_index] or came_from[n_index] != -1:
+                    continue
+                # No cutting corners diagonally past a wall
+                if step_x and step_y and (solid[index + step_x] or solid[index + step_y]):
+                    continue
+                came_from[n_index] = index
+                queue.append(n_index)
+
+        # Back to window indexes
+        for padded_row in range(1, rows + 1):
+            for padded_col in range(1, cols + 1):
+                previous = came_from[padded_row * width + padded_col]
+                if previous != -1:
+                    previous_row, previous_col = divmod(previous, width)
+                    next_cell[(padded_row - 1) * cols + padded_col - 1] = (previous_row - 1) * cols + previous_col - 1
+
+    def reachable(self, col, row):
+        # Whether grid cell (col, row) has a path to the target
+        col -= self.left
+        row -= self.top
+        return 0 <= col < self.cols and 0 <= row < self.rows and self.next_cell[row * self.cols + col] != -1
+
+    def direction_from(self, pos):
+        """Unit (x, y) from pos towards the center of the next cell on the path, or None."""
+        x, y = pos
+        col = int(x) // TILE_SIZE - self.left
+        row = int(y) // TILE_SIZE - self.top
+        if not (0 <= col < self.cols and 0 <= row < self.rows):
+            return None
+
+        index = row * self.cols + col
+        next_index = self.next_cell[index]
+        if next_index == -1 or next_index == index:
+            return None
+
+        # Steering at the next cell's center keeps bodies lined up with corridors
+        dx = (self.left + next_index % self.cols) * TILE_SIZE + TILE_SIZE / 2 - x
+        dy = (self.top + next_index // self.cols) * TILE_SIZE + TILE_SIZE / 2 - y
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return None
+        return (dx / length, dy / length)
@@ -1,49 +1,104 @@
+import random
 import pygame
-from map_layout import level_map
-from settings import TILE_SIZE
+from map_file import load_map, DEFAULT_MAP
+from settings import TILE_SIZE, BATCHED_ENEMIES, FLOW_FIELD_RADIUS
 from player import Player
 from enemy import Enemy
 from camera import CameraGroup
+from terrain import TerrainLayer
+from assets import assets
+from targeting import TargetIndex
+from spatial_hash import SpatialHash
+from collision_grid import CollisionGrid
+from flow_field import FlowField
+from enemy_swarm import EnemySwarm
+from crowd import CrowdGrid
+from projectile_batch import ProjectileBatch
+from controls import KeyboardControls
+from pool import Pool
+from particles import ParticleSystem
+from profiler import profiler
+from waves import WaveDirector
+from lod import EnemyLOD
+from xp import XPGems
+from world import WALL, CHEST
 
 
 class Level:
-    def __init__(self, surface):
+    def __init__(self, surface, controls=None, seed=None, world=None, map_path=DEFAULT_MAP):
         self.display_surface = surface
+        self.world = world  # A streamed ChunkedWorld to play in instead of the map file
+        self.map_path = map_path
+        self.controls = controls or KeyboardControls()  # Live keyboard unless scripted
+        self.random = random.Random(seed)  # Own RNG so a seed reproduces a run
 
         # Sprite groups
-        self.tiles = pygame.sprite.Group()             # All terrain tiles (walls, floors, etc.)
-        self.obstacle_sprites = pygame.sprite.Group()  # Collision obstacles
+        self.obstacle_sprites = pygame.sprite.Group()  # Merged wall rectangles projectiles stop at
+        self.wall_grid = None                          # obstacle_sprites hashed once, for the fixed map
         self.visible_sprites = None                    # Camera group for rendering
+        self.terrain = None                            # Pre-rendered floor/wall/chest chunks
         self.player_sprite = None
         self.enemy_sprites = pygame.sprite.Group()     # Enemy sprites
         self.projectiles = pygame.sprite.Group()       # Player projectiles
+        self.enemy_pool = Pool(Enemy)                  # Killed enemies, reused by spawn_enemy
+
+        # Enemy positions hashed into a uniform grid, rebuilt every tick for collision and targeting queries
+        self.enemy_grid = TargetIndex(TILE_SIZE * 2)
+        self.crowd = CrowdGrid()                       # Per-cell enemy crowds, for separation without a swarm
         
-        # Tile graphics
-        self.ground_tile = pygame.image.load("assets/tiles/floor_01.png").convert_alpha()
-        self.wall_tile = pygame.image.load("assets/tiles/wall_01.png").convert_alpha()
-        self.chest_tile = pygame.image.load("assets/tiles/chest_01.png").convert_alpha()
+        # Tile graphics, scaled once and shared by every tile
+        tile_size = (TILE_SIZE, TILE_SIZE)
+        self.ground_tile = assets.get("assets/tiles/floor_01.png", scale=tile_size)
+        self.wall_tile = assets.get("assets/tiles/wall_01.png", scale=tile_size)
+        self.chest_tile = assets.get("assets/tiles/chest_01.png", scale=tile_size)
 
         # Enemy spawning
-        self.spawn_timer = 0
-        self.spawn_cooldown = 3.0  # Spawn an enemy every 3 seconds
         self.enemy_spawn_points = []  # Will store valid spawn positions
 
         self.build_level()
 
     def build_level(self):
+        if self.world:
+            # Streamed world: cells are generated around the player as they are needed,
+            # and paths are only searched near the player
+            self.collision_grid = self.world
+            self.flow_field = FlowField(self.world, radius=FLOW_FIELD_RADIUS)
+        else:
+            # Grid and spawn/wall indexes come precompiled from the map's .mapc cache
+            self.map = load_map(self.map_path)
+            # Solid cells as a byte grid, so movement only looks at the cells it touches
+            self.collision_grid = CollisionGrid(self.map.cells, self.map.cols, self.map.rows)
+            # Path towards the player shared by every enemy
+            self.flow_field = FlowField(self.collision_grid)
+
         # Calculate map boundaries
-        map_width = len(level_map[0]) * TILE_SIZE
-        map_height = len(level_map) * TILE_SIZE
+        map_width = self.collision_grid.cols * TILE_SIZE
+        map_height = self.collision_grid.rows * TILE_SIZE
         self.map_bounds = pygame.Rect(0, 0, map_width, map_height)
+        start = (map_width // 2, map_height // 2)
+        if not self.world and self.map.player:
+            col, row = self.map.player
+            start = (col * TILE_SIZE + TILE_SIZE // 2, row * TILE_SIZE + TILE_SIZE // 2)
+
+        # Every projectile moved, aged and expired in bulk, when NumPy is available
+        self.projectile_batch = ProjectileBatch() if ProjectileBatch.available() else None
 
         # Create player first
         self.player_sprite = Player(
-            pos=(map_width // 2, map_height // 2),
-            obstacles=self.obstacle_sprites,
+            pos=start,
+            collision_grid=self.collision_grid,
             projectile_group=self.projectiles,
-            visible_sprites=None  # Will be set after camera group is created
+            visible_sprites=None,  # Will be set after camera group is created
+            controls=self.controls,
+            targets=self.enemy_grid,
+            projectile_batch=self.projectile_batch
         )
 
+        # Batched enemy simulation, when enabled and NumPy is available
+        self.enemy_swarm = None
+        if BATCHED_ENEMIES and EnemySwarm.available():
+            self.enemy_swarm = EnemySwarm(self.player_sprite, self.flow_field)
+
         # Create camera group with player
         self.visible_sprites = CameraGroup(self.player_sprite)
         
@@ -53,31 +108,45 @@ class Level:
         # Add player to visible sprites
         self.visible_sprites.add(self.player_sprite, layer=2)
 
-        for row_index, row in enumerate(level_map):
-            for col_index, cell in enumerate(row):
-                x = col_index * TILE_SIZE
-                y = row_index * TILE_SIZE
-
-                # Always place a floor tile first
-                floor_tile = Tile((x, y), self.ground_tile)
-                self.tiles.add(floor_tile)
-
-                # Then add other tiles if needed
-                if cell == "X":
-                    wall_tile = Tile((x, y), self.wall_tile)
-                    self.tiles.add(wall_tile)
-                    self.obstacle_sprites.add(wall_tile)
-                elif cell == "C":
-                    chest_tile = Tile((x, y), self.chest_tile)
-                    self.tiles.add(chest_tile)
-                    self.obstacle_sprites.add(chest_tile)  # Make chests solid for now
-                elif cell == "E":
-                    # Store enemy spawn points
-                    self.enemy_spawn_points.append((x + TILE_SIZE // 2, y + TILE_SIZE // 2))
-
-        # Add tiles to layer 0
-        for tile in self.tiles:
-            self.visible_sprites.add(tile, layer=0)
+        # Terrain never moves, so it is baked once and drawn as a few chunk blits per frame
+        # (a streamed world bakes its chunks as they come into view)
+        if self.world:
+            self.world.floor_image = self.ground_tile
+            self.world.cell_images = {WALL: self.wall_tile, CHEST: self.chest_tile}
+            self.terrain = self.world
+        else:
+            self.terrain = TerrainLayer(
+                self.map.cells, self.map.cols, self.map.rows,
+                floor_image=self.ground_tile,
+                cell_images={ord("X"): self.wall_tile, ord("C"): self.chest_tile}
+            )
+        self.visible_sprites.terrain = self.terrain
+
+        # Death particles for every sprite share one budgeted, batched system
+        self.particles = None
+        if ParticleSystem.available():
+            self.particles = ParticleSystem(seed=self.random.getrandbits(32))
+        self.visible_sprites.particles = self.particles
+
+        # XP gems dropped by enemies, one per grid cell and capped in number
+        self.xp_gems = XPGems(self.visible_sprites)
+
+        # Tile sprites and fixed spawn points (a streamed world has neither; enemies spawn around the player)
+        if not self.world:
+            # Merged wall rectangles (walls and chests) are projectile colliders, not drawn individually;
+            # they never move, so they are hashed once
+            for col, row, width, height in self.map.walls:
+                wall = Tile((col * TILE_SIZE, row * TILE_SIZE), self.wall_tile, (width * TILE_SIZE, height * TILE_SIZE))
+                self.obstacle_sprites.add(wall)
+            self.wall_grid = SpatialHash(TILE_SIZE * 4)
+            self.wall_grid.rebuild(self.obstacle_sprites)
+            self.enemy_spawn_points = [(col * TILE_SIZE + TILE_SIZE // 2, row * TILE_SIZE + TILE_SIZE // 2)
+                                       for col, row in self.map.spawns]
+
+        # Decides what spawns when and where, from the wave data in waves.py
+        self.wave_director = WaveDirector(self)
+        # Lowers the update rate of enemies the player can't see
+        self.enemy_lod = EnemyLOD(self)
 
         # Add enemies to layer 2
         for enemy in self.enemy_sprites:
@@ -87,67 +156,153 @@ class Level:
         for projectile in self.projectiles:
             self.visible_sprites.add(projectile, layer=3)    
 
-    def spawn_enemy(self):
-        if not self.enemy_spawn_points:
-            return
+    def spawn_enemy(self, spawn_pos=None, enemy_type='blob'):
+        if spawn_pos is None:
+            if not self.enemy_spawn_points:
+                return
 
-        # Choose a random spawn point
-        import random
-        spawn_pos = random.choice(self.enemy_spawn_points)
+            # Choose a random spawn point
+            spawn_pos = self.random.choice(self.enemy_spawn_points)
         
-        # Create new enemy
-        enemy = Enemy(
+        # Reuse a killed enemy if there is one
+        enemy = self.enemy_pool.acquire(
             pos=spawn_pos,
             player=self.player_sprite,
             visible_sprites=self.visible_sprites,
-            enemy_type='blob'
+            enemy_type=enemy_type,
+            flow_field=self.flow_field,
+            xp_gems=self.xp_gems,
+            crowd=None if self.enemy_swarm else self.crowd
         )
         self.enemy_sprites.add(enemy)
         self.visible_sprites.add(enemy, layer=2)
+        if self.enemy_swarm:
+            self.enemy_swarm.add(enemy)
+
+    def hits_wall(self, rect):
+        # By center, so big effect sprites launched next to a wall aren't cut off at once
+        if self.wall_grid:
+            return bool(self.wall_grid.collide(pygame.Rect(rect.center, (1, 1))))
+        # A streamed world has no precompiled walls; test the cell under the center instead
+        return self.collision_grid.is_solid(rect.centerx // TILE_SIZE, rect.centery // TILE_SIZE)
 
     def run(self, dt):
-        # Update spawn timer
-        self.spawn_timer += dt
-        if self.spawn_timer >= self.spawn_cooldown:
-            self.spawn_enemy()
-            self.spawn_timer = 0
+        # One simulation step followed by a frame, for callers without their own loop
+        self.update(dt)
+        self.draw()
 
-        # Ensure all projectiles are in the visible_sprites group
-        for projectile in self.projectiles:
-            if projectile not in self.visible_sprites:
-                self.visible_sprites.add(projectile, layer=3)
-            
-            # Check for collisions with enemies
-            for enemy in self.enemy_sprites:
-                if projectile.rect.colliderect(enemy.rect):
+    def update(self, dt):
+        # Remember where sprites were so drawing can interpolate towards this step
+        self.visible_sprites.snapshot()
+
+        # Read input once for the whole tick
+        self.controls.poll()
+
+        with profiler.scope('spawning'):
+            if self.wave_director:
+                self.wave_director.update(dt)
+
+        with profiler.scope('collisions'):
+            # Only enemies sharing a grid cell with something are collision-tested against it
+            if self.enemy_swarm:
+                # Straight from the swarm's arrays; off-screen sprites' rects lag behind
+                self.enemy_grid.rebuild_rects(self.enemy_swarm.sprites, self.enemy_swarm.rects())
+            else:
+                self.enemy_grid.rebuild(self.enemy_sprites)
+                # Separation for per-sprite enemies (the swarm computes its own from its arrays)
+                self.crowd.rebuild(self.enemy_sprites)
+
+            # Ensure all projectiles are in the visible_sprites group
+            for projectile in self.projectiles:
+                if projectile not in self.visible_sprites:
+                    self.visible_sprites.add(projectile, layer=3)
+
+                # Projectiles stop at walls
+                if self.hits_wall(projectile.rect):
+                    projectile.kill()
+                    continue
+
+                # Check for collisions with nearby enemies
+                for enemy in self.enemy_grid.collide(projectile.rect):
                     projectile.handle_collision(enemy)
 
-        # Check for collisions between player and enemies
-        if self.player_sprite:
-            for enemy in self.enemy_sprites:
-                if self.player_sprite.rect.colliderect(enemy.rect):
+            # Check for collisions between player and nearby enemies
+            if self.player_sprite:
+                for enemy in self.enemy_grid.collide(self.player_sprite.rect):
                     # Player takes damage from enemy
                     self.player_sprite.take_damage(enemy.stats['damage'])
 
-        # Update and draw all sprites
-        self.visible_sprites.update(dt)
-        self.visible_sprites.draw()
+        # Re-path only when the player has entered a new cell
+        with profiler.scope('pathing'):
+            if self.player_sprite:
+                self.flow_field.update(self.player_sprite.rect.center)
+
+        # Move every batched enemy in one go; their sprites then only animate
+        with profiler.scope('swarm'):
+            if self.enemy_swarm:
+                self.enemy_swarm.update(dt)
+
+        # Off-screen enemies take reduced-rate steps here and are skipped by the sprite update
+        with profiler.scope('lod'):
+            if self.enemy_lod:
+                self.enemy_lod.update(dt)
+
+        with profiler.scope('projectiles'):
+            if self.projectile_batch:
+                self.projectile_batch.update(dt)
+
+        # Update all sprites
+        with profiler.scope('sprites'):
+            self.visible_sprites.update(dt)
+        with profiler.scope('xp'):
+            if self.player_sprite.alive():
+                self.xp_gems.update(dt, self.player_sprite)
+        with profiler.scope('particles'):
+            if self.particles:
+                self.particles.update(dt)
+
+    def draw(self, alpha=1.0):
+        # alpha is how far between the previous and the current simulation step to draw
+        with profiler.scope('draw'):
+            self.visible_sprites.draw(alpha)
 
         # Draw weapon cooldown and health bar
-        if self.player_sprite:
-            # Calculate center position for cooldown bar
-            cooldown_pos = (self.player_sprite.rect.centerx - self.visible_sprites.offset.x - self.player_sprite.weapon.cooldown_rect.width // 2, 
-                          self.player_sprite.rect.y - self.visible_sprites.offset.y - 10)
-            self.player_sprite.weapon.draw_cooldown(self.display_surface, cooldown_pos)
-            
-            # Draw health bar
-            self.player_sprite.draw_health_bar(self.display_surface, self.visible_sprites.offset)
+        with profiler.scope('hud'):
+            if self.player_sprite:
+                # Calculate center position for cooldown bar
+                cooldown_pos = (self.player_sprite.rect.centerx - self.visible_sprites.offset.x - self.player_sprite.weapon.cooldown_rect.width // 2, 
+                              self.player_sprite.rect.y - self.visible_sprites.offset.y - 10)
+                mark = self.visible_sprites.mark  # HUD areas get pushed and cleaned up like sprites
+                mark(self.player_sprite.weapon.draw_cooldown(self.display_surface, cooldown_pos))
+
+                # Draw health bar
+                mark(self.player_sprite.draw_health_bar(self.display_surface, self.visible_sprites.offset))
+
+                # XP bar along the top of the screen
+                player = self.player_sprite
+                width = self.display_surface.get_width()
+                mark(pygame.draw.rect(self.display_surface, (40, 40, 60), (0, 0, width, 6)))
+                pygame.draw.rect(self.display_surface, (80, 160, 255), (0, 0, width * player.xp // player.xp_to_next, 6))
+
+        if profiler.enabled:
+            profiler.count('#enemies', len(self.enemy_sprites))
+            profiler.count('#projectiles', len(self.projectiles))
+            profiler.count('#sprites', len(self.visible_sprites))
+            if self.enemy_lod:
+                profiler.count('#near/far/parked', '/'.join(map(str, self.enemy_lod.counts())))
+            profiler.count('#gems', self.xp_gems.count())
+            profiler.count('#particles', self.particles.count if self.particles else 0)
 
+    def present(self):
+        # Show the drawn frame; while the camera is still, only the areas that changed are pushed
+        with profiler.scope('present'):
+            self.visible_sprites.present()
 
 
 class Tile(pygame.sprite.Sprite):
-    def __init__(self, pos, image):
+    def __init__(self, pos, image, size=None):
         super().__init__()
-        self.image = pygame.transform.scale(image, (TILE_SIZE, TILE_SIZE))
-        self.rect = self.image.get_rect(topleft=pos)
+        self.image = image  # already TILE_SIZE, shared between tiles
+        # A tile can stand in for a whole rectangle of solid cells
+        self.rect = pygame.Rect(pos, size) if size else self.image.get_rect(topleft=pos)
 
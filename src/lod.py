@@ -0,0 +1,70 @@
+from settings import LOD_MARGIN, LOD_INTERVAL, LOD_PARK_DISTANCE, LOD_DESPAWN_DISTANCE
+
+# Update detail levels, stored on each enemy as enemy.lod
+NEAR = 0    # On screen (plus margin): full update and animation every tick
+FAR = 1     # Off screen: moved every LOD_INTERVAL ticks with the time it missed, never animated
+PARKED = 2  # Far away: frozen until the player comes back
+
+
+class EnemyLOD:
+    def __init__(self, level, margin=LOD_MARGIN, interval=LOD_INTERVAL,
+                 park_distance=LOD_PARK_DISTANCE, despawn_distance=LOD_DESPAWN_DISTANCE):
+        self.level = level
+        self.margin = margin
+        self.interval = interval
+        self.park_distance = park_distance
+        self.despawn_distance = despawn_distance  # None keeps parked enemies forever
+        self.time = 0.0
+        self.phase = 0
+
+    def update(self, dt):
+        # Each tick re-checks a different 1/interval of the enemies, so every enemy is
+        # looked at once per interval and the cost is spread evenly over the ticks
+        self.time += dt
+        self.phase = (self.phase + 1) % self.interval
+
+        level = self.level
+        player_x, player_y = level.player_sprite.rect.center
+        near = level.visible_sprites.viewport.inflate(2 * self.margin, 2 * self.margin)
+        near.center = (player_x, player_y)  # The camera's viewport only moves on draw
+
+        enemies = level.enemy_sprites.sprites()[self.phase::self.interval]
+        if level.enemy_swarm:
+            level.enemy_swarm.sync_rects(enemies)  # The swarm only syncs NEAR sprites every tick
+        for enemy in enemies:
+            last_step = enemy.lod_time
+            enemy.lod_time = self.time
+            previous = enemy.lod
+
+            if near.colliderect(enemy.rect):
+                # Catch up on the time missed since the last reduced-rate step
+                if previous == FAR and enemy.swarm is None and last_step is not None:
+                    enemy.step(self.time - last_step - dt)
+                self.set_lod(enemy, NEAR)
+                continue
+
+            distance = max(abs(enemy.rect.centerx - player_x), abs(enemy.rect.centery - player_y))
+            if self.despawn_distance is not None and distance > self.despawn_distance:
+                enemy.kill()  # Back to the pool; the wave director spawns replacements nearby
+            elif distance > self.park_distance:
+                self.set_lod(enemy, PARKED)
+            else:
+                self.set_lod(enemy, FAR)
+                if previous == FAR and enemy.swarm is None and last_step is not None:
+                    enemy.step(self.time - last_step)
+                elif previous != FAR:
+                    # Until now it was updated every tick (or frozen), but this tick's sprite update
+                    # already skips it: the next catch-up has to cover this tick too
+                    enemy.lod_time = self.time - dt
+
+    def set_lod(self, enemy, lod):
+        enemy.lod = lod
+        if enemy.swarm:
+            enemy.swarm.parked[enemy.slot] = lod == PARKED
+            enemy.swarm.near[enemy.slot] = lod == NEAR
+
+    def counts(self):
+        counts = [0, 0, 0]
+        for enemy in self.level.enemy_sprites:
+            counts[enemy.lod] += 1
+        return counts
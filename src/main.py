@@ -1,38 +1,77 @@
+import argparse
+import random
 import sys
 
 import pygame
 
 from level import Level
-from player import Player
-from settings import FPS, SCREEN_HEIGHT, SCREEN_WIDTH, TITLE, BG_COLOR
+from controls import KeyboardControls
+from replay import Recording, RecordingControls
+from world import ChunkedWorld
+from timestep import FixedTimestep
+from profiler import profiler, PerfOverlay
+from settings import FPS, SCREEN_HEIGHT, SCREEN_WIDTH, TITLE
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument('--record', metavar='PATH', help="save this session's seed and inputs for replay")
+    parser.add_argument('--replay', metavar='PATH', help="play back a recorded session")
+    parser.add_argument('--world', metavar='SIZE', type=int, default=0,
+                        help="play in a streamed, generated SIZE x SIZE-cell arena instead of the map")
+    args = parser.parse_args(argv)
+
     # Initialize pygame
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption(TITLE)
     clock = pygame.time.Clock()
 
-    # Level setup
-    level = Level(screen)
+    # Level setup; a replay reuses the recorded seed and inputs, so it plays out identically
+    recording = None
+    if args.replay:
+        replay = Recording.load(args.replay)
+        random.seed(replay.seed)
+        world = ChunkedWorld(replay.world, replay.world, seed=replay.seed) if replay.world else None
+        level = Level(screen, controls=replay.controls(), seed=replay.seed, world=world)
+        timestep = FixedTimestep(rate=replay.sim_rate)
+    else:
+        seed = random.randrange(2 ** 32)
+        random.seed(seed)
+        controls = KeyboardControls()
+        if args.record:
+            recording = Recording(seed, world=args.world)
+            controls = RecordingControls(controls, recording)
+        world = ChunkedWorld(args.world, args.world, seed=seed) if args.world else None
+        level = Level(screen, controls=controls, seed=seed, world=world)
+        timestep = FixedTimestep()
+    overlay = PerfOverlay(profiler)  # F3 toggles profiling and the overlay
 
     # Main game loop
     running = True
     while running:
-        dt = clock.tick(FPS) / 1000  # Delta time in seconds
+        frame_time = clock.tick(FPS) / 1000  # Real seconds since the last rendered frame
 
         # 1. Handle events
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
+
+        # 2. Simulate in fixed steps, however long the frame took
+        for _ in range(timestep.advance(frame_time)):
+            level.update(timestep.step)
 
-        # 2. Draw everything
-        screen.fill(BG_COLOR)
-        level.run(dt)
-        pygame.display.flip()
+        # 3. Draw everything, interpolated between the last two steps
+        level.draw(timestep.alpha)
+        level.visible_sprites.mark(overlay.draw(screen))
+        level.present()
+        profiler.end_frame()
 
     # Clean up
+    if recording:
+        recording.save(args.record)
     pygame.quit()
     sys.exit()
 
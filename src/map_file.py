@@ -0,0 +1,174 @@
+import mmap
+import os
+import struct
+
+# Text maps are a grid of cell characters, one line per row; lines starting with "#" are comments.
+# Next to each text map a compiled cache (same name, .mapc) holds the parsed grid and the
+# indexes Level needs, so loading is one mapped read instead of parsing the text again:
+#
+#   header                     HEADER
+#   cells                      cols * rows bytes, row-major, one ASCII cell character each
+#   walls                      n_walls * RECT: solid cells merged into rectangles (col, row, width, height)
+#   enemy spawn points         n_spawns * CELL
+#   chests                     n_chests * CELL
+MAGIC = b'MPMC'
+VERSION = 2
+# magic, version, cols, rows, walls, spawns, chests, player col, player row, text size, text mtime
+HEADER = struct.Struct('<4sHHHIIIiiQQ')
+RECT = struct.Struct('<HHHH')
+CELL = struct.Struct('<HH')
+
+SOLID_CELLS = b"XC"
+DEFAULT_MAP = os.path.join('assets', 'maps', 'arena.txt')
+
+
+class MapData:
+    def __init__(self, cols, rows, cells, walls, spawns, chests, player=None):
+        self.cols = cols
+        self.rows = rows
+        self.cells = cells  # cols * rows cell characters as bytes (or a view of the mapped cache)
+        self.walls = walls  # (col, row, width, height) rectangles covering every solid cell once
+        self.spawns = spawns  # (col, row) enemy spawn cells
+        self.chests = chests  # (col, row) chest cells
+        self.player = player  # (col, row) player start, or None for the map center
+
+
+def parse_map(text, path='<map>'):
+    lines = [line.rstrip('\n') for line in text.splitlines()]
+    grid = [line for line in lines if line and not line.startswith('#')]
+    if not grid:
+        raise ValueError(f"{path} has no map rows")
+    rows = len(grid)
+    cols = max(len(line) for line in grid)
+    # Short lines are padded with walls so the map stays closed
+    cells = b''.join(line.ljust(cols, 'X').encode('ascii') for line in grid)
+
+    solid = [[cells[row * cols + col] in SOLID_CELLS for col in range(cols)] for row in range(rows)]
+    transposed = [list(column) for column in zip(*solid)]
+    # Long walls can run either way; keep whichever merge needs fewer rectangles
+    by_rows = merge_rects(solid)
+    by_cols = [(col, row, width, height) for row, col, height, width in merge_rects(transposed)]
+    walls = by_rows if len(by_rows) <= len(by_cols) else by_cols
+
+    spawns = []
+    chests = []
+    player = None
+    for row in range(rows):
+        line = cells[row * cols:(row + 1) * cols]
+        for col, cell in enumerate(line):
+            if cell == ord('E'):
+                spawns.append((col, row))
+            elif cell == ord('C'):
+                chests.append((col, row))
+            elif cell == ord('P'):
+                player = (col, row)
+    return MapData(cols, rows, cells, walls, spawns, chests, player)
+
+
+def merge_rects(solid):
+    """Cover the True cells of a 2D grid with (col, row, width, height) rectangles: each row is
+    split into horizontal runs, and a run grows down over identical runs in the rows below."""
+    rows = len(solid)
+    open_runs = {}  # (col, width) -> [col, row, width, height] still growing down
+    rects = []
+    for row in range(rows + 1):
+        runs = set()
+        line = solid[row] if row < rows else ()
+        col = 0
+        while col < len(line):
+            if line[col]:
+                start = col
+                while col < len(line) and line[col]:
+                    col += 1
+                runs.add((start, col - start))
+            else:
+                col += 1
+
+        for key in list(open_runs):
+            if key in runs:
+                open_runs[key][3] += 1
+                runs.discard(key)
+            else:
+                rects.append(tuple(open_runs.pop(key)))
+        for start, width in runs:
+            open_runs[(start, width)] = [start, row, width, 1]
+    return sorted(rects, key=lambda rect: (rect[1], rect[0]))
+
+
+def cache_path(path):
+    return os.path.splitext(path)[0] + '.mapc'
+
+
+def compile_map(path, data=None):
+    """Parse the text map at path (unless data is given) and write its .mapc cache."""
+    if data is None:
+        with open(path, encoding='ascii') as f:
+            data = parse_map(f.read(), path)
+    stat = os.stat(path)
+    player_col, player_row = data.player if data.player else (-1, -1)
+    # Written beside the cache and renamed over it, so a reader never maps a half-written file
+    target = cache_path(path)
+    temp = f'{target}.{os.getpid()}.tmp'
+    try:
+        with open(temp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, data.cols, data.rows, len(data.walls), len(data.spawns),
+                                len(data.chests), player_col, player_row, stat.st_size, stat.st_mtime_ns))
+            f.write(data.cells)
+            f.write(b''.join(RECT.pack(*wall) for wall in data.walls))
+            f.write(b''.join(CELL.pack(*cell) for cell in data.spawns))
+            f.write(b''.join(CELL.pack(*cell) for cell in data.chests))
+        os.replace(temp, target)
+    except BaseException:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        raise
+    return data
+
+
+def read_cache(path):
+    # The compiled map, or None if it is missing, older than the text map, or not the size its header says
+    try:
+        stat = os.stat(path)
+        f = open(cache_path(path), 'rb')
+    except OSError:
+        return None
+    with f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            return None
+
+    if len(buffer) < HEADER.size:
+        return None
+    (magic, version, cols, rows, n_walls, n_spawns, n_chests,
+     player_col, player_row, size, mtime) = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION or size != stat.st_size or mtime != stat.st_mtime_ns:
+        return None
+    if len(buffer) != HEADER.size + cols * rows + n_walls * RECT.size + (n_spawns + n_chests) * CELL.size:
+        return None  # Truncated or padded; the caller reparses the text
+
+    offset = HEADER.size
+    cells = memoryview(buffer)[offset:offset + cols * rows]
+    offset += cols * rows
+    walls = list(RECT.iter_unpack(buffer[offset:offset + n_walls * RECT.size]))
+    offset += n_walls * RECT.size
+    spawns = list(CELL.iter_unpack(buffer[offset:offset + n_spawns * CELL.size]))
+    offset += n_spawns * CELL.size
+    chests = list(CELL.iter_unpack(buffer[offset:offset + n_chests * CELL.size]))
+    player = (player_col, player_row) if player_col >= 0 else None
+    return MapData(cols, rows, cells, walls, spawns, chests, player)
+
+
+def load_map(path=DEFAULT_MAP):
+    """Load a map, from its compiled cache when that is up to date, else from the text (re-caching it)."""
+    data = read_cache(path)
+    if data is None:
+        with open(path, encoding='ascii') as f:
+            data = parse_map(f.read(), path)
+        try:
+            compile_map(path, data)
+        except OSError:
+            pass  # Read-only install; parse again next time
+    return data
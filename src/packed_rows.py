@@ -0,0 +1,63 @@
+try:
+    import numpy as np
+except ImportError:  # Batched simulation is optional; callers check available() first
+    np = None
+
+
+class PackedRows:
+    """Per-sprite state as NumPy columns, with live sprites packed into the first `count` rows.
+
+    Subclasses list their columns in FIELDS and name the sprite attribute pointing back at
+    them in OWNER; each sprite also gets its row number as sprite.slot.
+    """
+
+    FIELDS = {}  # name -> (columns, dtype); None columns for a flat array
+    OWNER = None  # Sprite attribute set to the container while the sprite has a row
+
+    def __init__(self, capacity=256):
+        self.count = 0
+        self.capacity = capacity
+        self.sprites = []
+        for name, (columns, dtype) in self.FIELDS.items():
+            shape = (capacity, columns) if columns else capacity
+            setattr(self, name, np.zeros(shape, dtype=dtype))
+
+    @staticmethod
+    def available():
+        return np is not None
+
+    def grow(self):
+        self.capacity *= 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros((self.capacity, *old.shape[1:]), dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add_row(self, sprite):
+        # Claims the next row for sprite; the caller fills in its columns
+        if self.count == self.capacity:
+            self.grow()
+
+        slot = self.count
+        self.count += 1
+        self.sprites.append(sprite)
+        setattr(sprite, self.OWNER, self)
+        sprite.slot = slot
+        return slot
+
+    def remove(self, sprite):
+        # Swap the last row into the freed slot so live rows stay contiguous
+        slot = sprite.slot
+        last = self.count - 1
+        if slot != last:
+            for name in self.FIELDS:
+                array = getattr(self, name)
+                array[slot] = array[last]
+            moved = self.sprites[last]
+            self.sprites[slot] = moved
+            moved.slot = slot
+        self.sprites.pop()
+        self.count -= 1
+        setattr(sprite, self.OWNER, None)
+        sprite.slot = -1
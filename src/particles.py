@@ -0,0 +1,132 @@
+import weakref
+import pygame
+from settings import PARTICLE_BUDGET
+
+try:
+    import numpy as np
+except ImportError:  # Without NumPy deaths fall back to per-sprite DisintegrationEffects
+    np = None
+
+
+def disc_offsets(radius):
+    # Pixel offsets covering a filled circle of this radius
+    span = np.arange(-radius, radius + 1)
+    dx, dy = np.meshgrid(span, span, indexing='ij')
+    inside = dx * dx + dy * dy <= radius * radius
+    return dx[inside], dy[inside]
+
+
+class ParticleSystem:
+    RADII = (2, 3, 4)  # Particle sizes are drawn as one of these filled circles
+
+    def __init__(self, budget=PARTICLE_BUDGET, seed=None, spacing=4):
+        self.budget = budget  # Hard cap; emits past it are dropped
+        self.spacing = spacing  # Sample one particle per spacing x spacing pixels
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+
+        # Live particles are packed into the first `count` rows
+        self.pos = np.zeros((budget, 2), dtype=np.float32)
+        self.vel = np.zeros((budget, 2), dtype=np.float32)
+        self.color = np.zeros((budget, 3), dtype=np.float32)
+        self.age = np.zeros(budget, dtype=np.float32)
+        self.duration = np.ones(budget, dtype=np.float32)
+        self.radius = np.zeros(budget, dtype=np.int8)
+
+        self.offsets = {radius: disc_offsets(radius) for radius in self.RADII}
+        # image -> (x offsets, y offsets, colors) of its opaque sample points; frames are shared,
+        # so most deaths skip reading pixels entirely
+        self.samples = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def available():
+        return np is not None
+
+    def clear(self):
+        self.count = 0
+
+    def emit_from_image(self, image, rect, duration):
+        """Break image (drawn at world-space rect) into particles, sampled from its pixel arrays."""
+        free = self.budget - self.count
+        if free <= 0:
+            return
+
+        sample = self.samples.get(image)
+        if sample is None:
+            sample = self.samples[image] = self.sample(image)
+        xs, ys, colors = sample
+
+        n = min(len(xs), free)
+        if n == 0:
+            return
+
+        start = self.count
+        end = start + n
+        self.pos[start:end, 0] = rect.x + xs[:n]
+        self.pos[start:end, 1] = rect.y + ys[:n]
+        self.vel[start:end, 0] = self.rng.uniform(-50, 50, n)  # Random horizontal velocity
+        self.vel[start:end, 1] = self.rng.uniform(50, 150, n)  # Falling velocity
+        self.color[start:end] = colors[:n]
+        self.age[start:end] = 0
+        self.duration[start:end] = duration
+        self.radius[start:end] = self.rng.choice(self.RADII, n)
+        self.count = end
+
+    def sample(self, image):
+        step = self.spacing
+        alpha = pygame.surfarray.array_alpha(image)[::step, ::step]
+        xs, ys = np.nonzero(alpha)
+        colors = pygame.surfarray.array3d(image)[::step, ::step][xs, ys]
+        return xs * step, ys * step, colors
+
+    def update(self, dt):
+        n = self.count
+        if n == 0:
+            return
+
+        self.pos[:n] += self.vel[:n] * dt
+        self.age[:n] += dt
+
+        # Drop finished particles, keeping the live ones packed at the front
+        alive = self.age[:n] < self.duration[:n]
+        kept = int(alive.sum())
+        if kept < n:
+            for array in (self.pos, self.vel, self.color, self.age, self.duration, self.radius):
+                array[:kept] = array[:n][alive]
+            self.count = kept
+
+    def draw(self, surface, viewport):
+        """Blend the particles into surface; returns the screen rect they cover, or None."""
+        n = self.count
+        if n == 0:
+            return None
+
+        width, height = surface.get_size()
+        x = (self.pos[:n, 0] - viewport.x).astype(np.int32)
+        y = (self.pos[:n, 1] - viewport.y).astype(np.int32)
+        alpha = np.clip(1 - self.age[:n] / self.duration[:n], 0, 1)
+
+        # Blend every particle of a given size in one go, straight into the target's pixels
+        pixels = pygame.surfarray.pixels3d(surface)
+        area = None
+        for radius, (dx, dy) in self.offsets.items():
+            group = np.nonzero((self.radius[:n] == radius)
+                               & (x > -radius) & (x < width + radius)
+                               & (y > -radius) & (y < height + radius))[0]
+            if len(group) == 0:
+                continue
+
+            px = (x[group, None] + dx).ravel()
+            py = (y[group, None] + dy).ravel()
+            a = np.repeat(alpha[group], len(dx))[:, None]
+            c = np.repeat(self.color[group], len(dx), axis=0)
+            on_screen = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+            px, py, a, c = px[on_screen], py[on_screen], a[on_screen], c[on_screen]
+
+            pixels[px, py] = (pixels[px, py] * (1 - a) + c * a).astype(np.uint8)
+            if len(px):
+                left, top = int(px.min()), int(py.min())
+                bounds = pygame.Rect(left, top, int(px.max()) - left + 1, int(py.max()) - top + 1)
+                area = area.union(bounds) if area else bounds
+        del pixels  # Unlock the surface
+        return area
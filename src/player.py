@@ -1,10 +1,17 @@
 import pygame
 import os
-from settings import TILE_SIZE
-from weapon import Weapon
+from settings import TILE_SIZE, MAGNET_RADIUS
+from assets import AnimationSet
+from weapon import Weapon, WEAPON_PRESETS
+from controls import KeyboardControls, UP, DOWN, LEFT, RIGHT
+from xp import xp_for_level
+from profiler import profiler
+
+FLASH_TINT = (255, 0, 0, 128)  # Red with 50% opacity
+
 
 class Player(pygame.sprite.Sprite):
-    def __init__(self, pos, obstacles, projectile_group, visible_sprites):
+    def __init__(self, pos, collision_grid, projectile_group, visible_sprites, controls=None, targets=None, projectile_batch=None):
         super().__init__()
         self.frame_index = 0
         self.animation_speed = 10  # Frames per second
@@ -12,9 +19,10 @@ class Player(pygame.sprite.Sprite):
         self.speed = 200  # pixels per second
         self.facing_left = False
         self.map_bounds = None  # Will be set by Level class
-        self.obstacles = obstacles
+        self.collision_grid = collision_grid  # Tile grid walls are resolved against
         self.last_direction = (1, 0)  # Default to right direction
         self.visible_sprites = visible_sprites  # Store reference to visible_sprites
+        self.controls = controls or KeyboardControls()  # Polled once per tick by the Level
 
         # Health and damage attributes
         self.max_health = 100
@@ -26,57 +34,69 @@ class Player(pygame.sprite.Sprite):
         self.flash_duration = 0.2  # Duration of the flash effect
         self.is_flashing = False
 
+        # Experience
+        self.level = 1
+        self.xp = 0
+        self.xp_to_next = xp_for_level(self.level)
+        self.magnet_radius = MAGNET_RADIUS  # XP gems this close fly to the player
+
         # Health bar attributes
         self.health_bar_width = 50
         self.health_bar_height = 5
         self.health_bar_rect = pygame.Rect(0, 0, self.health_bar_width, self.health_bar_height)
+        self.health_bar_surface = pygame.Surface(self.health_bar_rect.size)
+        profiler.increment('surface allocs')
+        self.health_bar_width_drawn = None  # Red width currently in health_bar_surface
 
-        # Load and slice animations
-        self.animations = {
+        # Load and slice animations, with flipped and flashing variants pre-rendered
+        self.animation_set = AnimationSet({
             'idle': self.load_animation('player_idle.png', 9),
             'walk': self.load_animation('player_walk.png', 4),
-        }
-        # Cache flipped frames
-        self.flipped_animations = {
-            'idle': [pygame.transform.flip(frame, True, False) for frame in self.animations['idle']],
-            'walk': [pygame.transform.flip(frame, True, False) for frame in self.animations['walk']]
-        }
+        }, tints=[FLASH_TINT])
 
         self.status = 'idle'
-        self.image = self.animations[self.status][self.frame_index]
+        self.image = self.animation_set.frames(self.status)[self.frame_index]
         self.rect = self.image.get_rect(center=pos)
-
-        # Set up projectile image and weapon
-        self.weapon = Weapon(
+        self.position = pygame.Vector2(self.rect.center)  # Exact center; rect is the rounded copy
+
+        # Weapon loadout; every weapon fires on its own cooldown
+        self.projectile_group = projectile_group
+        self.targets = targets  # Shared enemy index for targeting weapons
+        self.projectile_batch = projectile_batch
+        self.weapons = []
+        self.weapon = self.add_weapon("orb")  # Starting weapon, shown by the HUD cooldown bar
+
+    def add_weapon(self, preset, **overrides):
+        # Add a weapon from WEAPON_PRESETS to the loadout, optionally tweaking its stats
+        weapon = Weapon(
             owner=self,
-            projectile_group=projectile_group,
-            effect_type="blue_orb",
-            cooldown=2000,  # 2 seconds between shots
-            speed=250,
-            lifespan=2000, # 2 seconds lifespan
-            damage=10,
-            weapon_type="effect"
+            projectile_group=self.projectile_group,
+            weapon_type="effect",
+            targets=self.targets,
+            projectile_batch=self.projectile_batch,
+            **{**WEAPON_PRESETS[preset], **overrides}
         )
+        self.weapons.append(weapon)
+        return weapon
 
     def load_animation(self, filename, num_frames):
+        # Frame sources as (path, rect, scale) for AnimationSet
         path = os.path.join('assets', 'sprites', filename)
-        sprite_sheet = pygame.image.load(path).convert_alpha()
-        print(f"Loading {filename}: {sprite_sheet.get_width()}x{sprite_sheet.get_height()}")
-        return [sprite_sheet.subsurface(pygame.Rect(i * TILE_SIZE, 0, TILE_SIZE, TILE_SIZE))
+        return [(path, pygame.Rect(i * TILE_SIZE, 0, TILE_SIZE, TILE_SIZE), None)
                 for i in range(num_frames)]
 
     def handle_input(self):
-        keys = pygame.key.get_pressed()
+        buttons = self.controls.buttons
         direction = pygame.Vector2(0, 0)
 
-        if keys[pygame.K_w] or keys[pygame.K_UP]:
+        if buttons & UP:
             direction.y = -1
-        if keys[pygame.K_s] or keys[pygame.K_DOWN]:
+        if buttons & DOWN:
             direction.y = 1
-        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
+        if buttons & LEFT:
             self.facing_left = True
             direction.x = -1
-        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
+        if buttons & RIGHT:
             self.facing_left = False
             direction.x = 1
 
@@ -89,31 +109,23 @@ class Player(pygame.sprite.Sprite):
         if direction.length() == 0:
             return
 
-        # Store original position
-        original_x = self.rect.x
-        original_y = self.rect.y
-
         # Calculate movement
         movement = direction * self.speed * dt
 
-        # Try moving on X axis first
-        self.rect.x += movement.x
-        for sprite in self.obstacles:
-            if self.rect.colliderect(sprite.rect):
-                self.rect.x = original_x
-                break
+        target = self.position + movement
 
-        # Then try moving on Y axis
-        self.rect.y += movement.y
-        for sprite in self.obstacles:
-            if self.rect.colliderect(sprite.rect):
-                self.rect.y = original_y
-                break
+        # Sweep X then Y by whole pixels against only the grid cells the rect overlaps
+        self.collision_grid.move(self.rect, round(target.x) - self.rect.centerx,
+                                 round(target.y) - self.rect.centery)
 
         # Ensure we stay within map bounds
         if self.map_bounds:
             self.rect.clamp_ip(self.map_bounds)
 
+        # Keep the sub-pixel remainder unless a wall or the bounds stopped us
+        self.position.x = target.x if self.rect.centerx == round(target.x) else self.rect.centerx
+        self.position.y = target.y if self.rect.centery == round(target.y) else self.rect.centery
+
     def animate(self, dt):
         # Update flash timer
         if self.is_flashing:
@@ -121,24 +133,14 @@ class Player(pygame.sprite.Sprite):
             if self.flash_timer <= 0:
                 self.is_flashing = False
 
-        frames = self.flipped_animations[self.status] if self.facing_left else self.animations[self.status]
+        # Flipped and flashing frames are pre-rendered, so this is a plain lookup
+        tint = FLASH_TINT if self.is_flashing else None
+        frames = self.animation_set.frames(self.status, self.facing_left, tint)
         self.frame_index += self.animation_speed * dt
         if self.frame_index >= len(frames):
             self.frame_index = 0
         self.image = frames[int(self.frame_index)]
 
-        # Apply flash effect if active
-        if self.is_flashing:
-            # Create a copy of the current frame
-            flash_image = self.image.copy()
-            # Create a white surface with the same size
-            flash_surface = pygame.Surface(flash_image.get_size(), pygame.SRCALPHA)
-            flash_surface.fill((255, 0, 0, 128))  # Red with 50% opacity
-            # Blend the red surface with the original image
-            flash_image.blit(flash_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-            # Apply the flash effect
-            self.image = flash_image
-
     def take_damage(self, amount):
         if not self.is_hurt:  # Only take damage if not in invincibility period
             self.health -= amount
@@ -151,11 +153,17 @@ class Player(pygame.sprite.Sprite):
             if self.health <= 0:
                 self.die()
 
+    def gain_xp(self, amount):
+        self.xp += amount
+        while self.xp >= self.xp_to_next:
+            self.xp -= self.xp_to_next
+            self.level += 1
+            self.xp_to_next = xp_for_level(self.level)
+
     def die(self):
         # Create disintegration effect before killing the player
-        from disintegration_effect import DisintegrationEffect
-        effect = DisintegrationEffect(self, duration=1.0)
-        self.visible_sprites.add(effect, layer=3)  # Add to visible sprites with high layer
+        from disintegration_effect import disintegrate
+        disintegrate(self, self.visible_sprites, duration=1.0)
         self.kill()
 
     def update(self, dt):
@@ -168,6 +176,8 @@ class Player(pygame.sprite.Sprite):
         direction = self.handle_input()
         self.status = "walk" if direction.length() > 0 else "idle"
         self.move_and_collide(direction, dt)
+        for weapon in self.weapons:
+            weapon.update(dt)
         self.auto_attack()
         self.animate(dt)
 
@@ -176,10 +186,12 @@ class Player(pygame.sprite.Sprite):
         direction = self.handle_input()
         if direction.length() > 0:
             # Use the movement direction
-            self.weapon.shoot(direction=(direction.x, direction.y))
+            direction = (direction.x, direction.y)
         else:
             # Use the last movement direction
-            self.weapon.shoot(direction=self.last_direction)
+            direction = self.last_direction
+        for weapon in self.weapons:
+            weapon.shoot(direction=direction)
 
     def draw_health_bar(self, surface, offset):
         # Calculate health bar position (centered below player)
@@ -195,14 +207,15 @@ class Player(pygame.sprite.Sprite):
                 self.rect.bottom - offset.y + 3  # pixels below the player
             )
         
-        # Draw background (gray)
-        pygame.draw.rect(surface, (100, 100, 100), 
-                        (*health_bar_pos, self.health_bar_width, self.health_bar_height))
-        
         # Calculate current health width
-        current_health_width = int((self.health / self.max_health) * self.health_bar_width)
+        current_health_width = max(0, int((self.health / self.max_health) * self.health_bar_width))
+        
+        # Re-render the bar (gray background, red health) only when the health shown changes
+        if current_health_width != self.health_bar_width_drawn:
+            self.health_bar_surface.fill((100, 100, 100))
+            if current_health_width > 0:
+                self.health_bar_surface.fill((255, 0, 0), (0, 0, current_health_width, self.health_bar_height))
+            self.health_bar_width_drawn = current_health_width
         
-        # Draw health (red)
-        if current_health_width > 0:
-            pygame.draw.rect(surface, (255, 0, 0),
-                           (*health_bar_pos, current_health_width, self.health_bar_height))
\ No newline at end of file
+        # Returns the screen rect it covers
+        return surface.blit(self.health_bar_surface, health_bar_pos)
\ No newline at end of file
@@ -0,0 +1,37 @@
+import pygame
+
+
+class Pool:
+    def __init__(self, factory, max_size=None):
+        self.factory = factory  # Called with acquire()'s arguments when the pool is empty
+        self.max_size = max_size
+        self.free = []
+
+    def acquire(self, *args, **kwargs):
+        """Return a released object reset with these arguments, or a new one."""
+        if self.free:
+            obj = self.free.pop()
+            obj.in_pool = False
+            obj.reset(*args, **kwargs)
+        else:
+            obj = self.factory(*args, **kwargs)
+            obj.pool = self
+        return obj
+
+    def release(self, obj):
+        # kill() can run more than once in a frame; only pool each object once
+        if obj.in_pool:
+            return
+        if self.max_size is None or len(self.free) < self.max_size:
+            obj.in_pool = True
+            self.free.append(obj)
+
+
+class PooledSprite(pygame.sprite.Sprite):
+    pool = None  # Set by the Pool that created this sprite
+    in_pool = False
+
+    def kill(self):
+        super().kill()
+        if self.pool:
+            self.pool.release(self)
@@ -0,0 +1,214 @@
+import csv
+import gc
+import json
+import time
+from collections import deque
+
+import pygame
+
+# Upper edges (ms) of the rolling histogram buckets per stage; the last bucket takes the rest
+HISTOGRAM_EDGES = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16)
+
+
+class NullScope:
+    # Shared do-nothing scope handed out while profiling is off
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SCOPE = NullScope()
+
+
+class Scope:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        current = self.profiler.current
+        current[self.name] = current.get(self.name, 0.0) + (time.perf_counter() - self.start) * 1000
+        return False
+
+
+class Profiler:
+    def __init__(self, history=240):
+        self.enabled = False
+        self.history = history  # Frames kept per stage for the rolling stats
+        self.stages = {}  # stage name -> deque of ms per frame
+        self.current = {}  # stage name -> ms so far this frame
+        self.counts = {}  # name -> latest value (entity counts and the like)
+        self.counters = {}  # name -> increments so far this frame (surface allocations, ...)
+        self.last_counters = {}  # counters of the last finished frame
+        self.trace = None  # List of per-frame rows while a trace is being recorded
+        self.gc_start = 0.0
+
+    def enable(self, enabled=True):
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        # Only watch the collector while profiling, so it costs nothing otherwise
+        if enabled:
+            gc.callbacks.append(self.on_gc)
+        else:
+            gc.callbacks.remove(self.on_gc)
+
+    def toggle(self):
+        self.enable(not self.enabled)
+
+    def scope(self, name):
+        """Time a `with` block under name; a shared no-op when profiling is off."""
+        if not self.enabled:
+            return NULL_SCOPE
+        return Scope(self, name)
+
+    def count(self, name, value):
+        if self.enabled:
+            self.counts[name] = value
+
+    def increment(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def on_gc(self, phase, info):
+        if phase == 'start':
+            self.gc_start = time.perf_counter()
+        else:
+            self.increment('gc pause ms', (time.perf_counter() - self.gc_start) * 1000)
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+
+        for name, ms in self.current.items():
+            samples = self.stages.get(name)
+            if samples is None:
+                samples = self.stages[name] = deque(maxlen=self.history)
+            samples.append(ms)
+
+        if self.trace is not None:
+            self.trace.append({**self.current, **self.counts, **self.counters})
+
+        self.current = {}
+        self.last_counters = self.counters
+        self.counters = {}
+
+    def stats(self, name):
+        """(last, mean, p95, max) ms for a stage over the rolling history."""
+        samples = self.stages.get(name)
+        if not samples:
+            return 0.0, 0.0, 0.0, 0.0
+        ordered = sorted(samples)
+        return (samples[-1], sum(samples) / len(samples),
+                ordered[int(0.95 * (len(ordered) - 1))], ordered[-1])
+
+    def histogram(self, name, edges=HISTOGRAM_EDGES):
+        """Frame counts per ms bucket for a stage over the rolling history, len(edges) + 1 of them."""
+        counts = [0] * (len(edges) + 1)
+        for ms in self.stages.get(name, ()):
+            bucket = 0
+            while bucket < len(edges) and ms > edges[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        return counts
+
+    def start_trace(self):
+        self.trace = []
+        self.enable()
+
+    def dump(self, path):
+        """Write the recorded per-frame trace as JSON, or CSV if path ends in .csv."""
+        rows = self.trace or []
+        if path.endswith('.csv'):
+            columns = sorted({column for row in rows for column in row})
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=columns, restval=0)
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            with open(path, 'w') as f:
+                json.dump(rows, f)
+
+
+class PerfOverlay:
+    COLUMN_WIDTH = 52  # Pixels per number column, after a wider name column
+
+    def __init__(self, profiler, refresh=0.25):
+        self.profiler = profiler
+        self.refresh = refresh  # Seconds between re-rendering the text
+        self.font = None
+        self.background = None
+        self.cells = []  # (text surface, position) pairs, re-rendered every refresh
+        self.last_render = 0.0
+
+    def draw(self, surface):
+        # Returns the screen rect drawn over, or None when hidden
+        if not self.profiler.enabled:
+            return None
+
+        now = time.perf_counter()
+        if now - self.last_render >= self.refresh:
+            self.render()
+            self.last_render = now
+
+        area = surface.blit(self.background, (0, 0))
+        for text, pos in self.cells:
+            surface.blit(text, pos)
+        return area
+
+    def render(self):
+        if self.font is None:
+            self.font = pygame.font.Font(None, 18)
+
+        profiler = self.profiler
+        rows = [['stage', 'ms', 'avg', 'p95', 'max']]
+        stage_rows = len(profiler.stages)
+        for name in profiler.stages:
+            rows.append([name, *(f"{value:.2f}" for value in profiler.stats(name))])
+        for name, value in profiler.counts.items():
+            rows.append([name, str(value)])
+        for name in ('surface allocs', 'gc pause ms'):
+            rows.append([name, f"{profiler.last_counters.get(name, 0):.2f}"])
+
+        line_height = self.font.get_linesize()
+        name_width = 100
+        self.cells = []
+        for row_index, row in enumerate(rows):
+            y = 4 + row_index * line_height
+            for column, value in enumerate(row):
+                text = self.font.render(value, True, (255, 255, 255))
+                if column == 0:
+                    x = 4
+                else:
+                    # Right-align numbers in their column
+                    x = 4 + name_width + column * self.COLUMN_WIDTH - text.get_width()
+                self.cells.append((text, (x, y)))
+
+        table_width = 8 + name_width + 4 * self.COLUMN_WIDTH
+        bar_width = 4
+        size = (table_width + (len(HISTOGRAM_EDGES) + 1) * bar_width + 4, 8 + len(rows) * line_height)
+        self.background = pygame.Surface(size)
+        self.background.set_alpha(180)
+        profiler.increment('surface allocs', len(self.cells) + 1)
+
+        # Each stage's rolling histogram as a row of bars, 0.1 ms on the left to 16+ ms on the right
+        for row_index, name in enumerate(list(profiler.stages)[:stage_rows], start=1):
+            counts = profiler.histogram(name)
+            total = sum(counts) or 1
+            bottom = 4 + (row_index + 1) * line_height - 2
+            for bucket, count in enumerate(counts):
+                height = round((line_height - 4) * count / total)
+                if height:
+                    pygame.draw.rect(self.background, (120, 200, 255),
+                                     (table_width + bucket * bar_width, bottom - height, bar_width - 1, height))
+
+
+# Shared instance; scopes are no-ops until enable()/toggle()
+profiler = Profiler()
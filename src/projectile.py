@@ -1,43 +1,95 @@
 import pygame
+from collections import deque
 from settings import TILE_SIZE
+from assets import assets
+from pool import PooledSprite
 
-class Projectile(pygame.sprite.Sprite):
+class Projectile(PooledSprite):
     def __init__(self, pos, direction, speed, lifespan, image, damage=10, weapon_type="basic"):
         super().__init__()
+        self.batch = None  # Set while a ProjectileBatch moves this projectile
+        self.slot = -1  # Row in the batch's arrays
+        self.max_trail_length = 5
+        self.trail_positions = deque(maxlen=self.max_trail_length)
+        self.reset(pos, direction, speed, lifespan, image, damage, weapon_type)
+
+    def reset(self, pos, direction, speed, lifespan, image, damage=10, weapon_type="basic"):
+        # Also used to relaunch a pooled projectile
         self.original_image = image
-        self.image = self.original_image.copy()
-        self.rect = self.image.get_rect(center=pos)
+        self.position = pygame.Vector2(pos)  # Exact center; rect is the rounded copy
         self.direction = pygame.math.Vector2(direction).normalize()
         self.speed = speed
-        self.spawn_time = pygame.time.get_ticks()
+        self.age = 0  # ms of simulation time since spawning
         self.lifespan = lifespan
         self.damage = damage
         self.weapon_type = weapon_type
         
-        # Trail effect
-        self.trail_positions = []
-        self.max_trail_length = 5
+        # Homing, switched on by the weapon after launch: turn rate in degrees per second
+        # towards the nearest enemy in targets (a TargetIndex) within target_range
+        self.homing = 0
+        self.targets = None
+        self.target_range = 0
+        
+        # Trail effect (only kept by unbatched projectiles)
+        self.trail_positions.clear()
         
-        # Rotate image to match direction
-        angle = pygame.math.Vector2(1, 0).angle_to(self.direction)
-        self.image = pygame.transform.rotate(self.original_image, -angle)
+        # Pick the pre-rotated frames nearest to the direction; nothing is transformed per shot
+        self.frame_index = 0
+        self.animation_frames = self.oriented_frames()
+        self.image = self.animation_frames[0]
         self.rect = self.image.get_rect(center=pos)
 
+    def oriented_frames(self):
+        return assets.rotated(self.original_image, [self.original_image]).frames(self.direction)
+
+    def steer(self, dt):
+        targets = self.targets.nearest(self.rect.center, 1, self.target_range)
+        if not targets:
+            return
+        desired = pygame.Vector2(targets[0].rect.center) - self.rect.center
+        if desired.length_squared() == 0:
+            return
+
+        # Turn towards the target by at most homing * dt degrees
+        angle = (self.direction.angle_to(desired) + 180) % 360 - 180
+        limit = self.homing * dt
+        self.direction.rotate_ip(max(-limit, min(limit, angle)))
+        self.animation_frames = self.oriented_frames()
+        if self.batch:
+            self.batch.steer(self.slot, self.direction, self.speed)
+
     def update(self, dt):
-        # Store current position for trail
+        # Movement, lifetime and animation are batched when there is a batch
+        if not self.batch:
+            self.advance(dt)
+
+    def advance(self, dt):
+        if self.homing and self.targets:
+            self.steer(dt)
+        self.image = self.animation_frames[int(self.frame_index)]
+
+        # Store current position for trail (the deque drops the oldest)
         self.trail_positions.append(self.rect.center)
-        if len(self.trail_positions) > self.max_trail_length:
-            self.trail_positions.pop(0)
             
         # Move projectile
-        self.rect.x += self.direction.x * self.speed * dt
-        self.rect.y += self.direction.y * self.speed * dt
+        self.position += self.direction * (self.speed * dt)
+        self.rect.center = (round(self.position.x), round(self.position.y))
 
         # Check lifespan
-        current_time = pygame.time.get_ticks()
-        if current_time - self.spawn_time > self.lifespan:
+        self.age += dt * 1000
+        if self.age > self.lifespan:
             self.kill()
 
+    def sync(self, center, frame_index):
+        # Called by ProjectileBatch.update with this projectile's batched results
+        self.rect.center = center
+        self.image = self.animation_frames[frame_index]
+
+    def kill(self):
+        if self.batch:
+            self.batch.remove(self)
+        super().kill()
+
     def draw(self, surface):
         # Draw trail
         if len(self.trail_positions) > 1:
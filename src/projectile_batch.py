@@ -0,0 +1,60 @@
+from packed_rows import PackedRows, np
+
+
+class ProjectileBatch(PackedRows):
+    # Per-projectile state as (columns, dtype); projectiles fall back to per-sprite updates without NumPy
+    OWNER = 'batch'
+    FIELDS = {
+        'pos': (2, float),
+        'vel': (2, float),
+        'age': (None, float),  # ms, like Projectile.age
+        'lifespan': (None, float),
+        'frame': (None, float),
+        'animation_speed': (None, float),  # Frames per second; 0 for still images
+        'frame_count': (None, float),
+        'homing': (None, bool),
+    }
+
+    def add(self, projectile):
+        slot = self.add_row(projectile)
+        self.pos[slot] = projectile.position
+        self.vel[slot] = projectile.direction * projectile.speed
+        self.age[slot] = projectile.age
+        self.lifespan[slot] = projectile.lifespan
+        self.frame[slot] = projectile.frame_index
+        self.animation_speed[slot] = getattr(projectile, 'animation_speed', 0)
+        self.frame_count[slot] = len(projectile.animation_frames)
+        self.homing[slot] = bool(projectile.homing and projectile.targets)
+
+    def steer(self, slot, direction, speed):
+        self.vel[slot] = (direction.x * speed, direction.y * speed)
+
+    def update(self, dt):
+        n = self.count
+        if n == 0:
+            return
+
+        # Homing projectiles pick their new heading one by one (each needs a target query)
+        for slot in np.nonzero(self.homing[:n])[0].tolist():
+            self.sprites[slot].steer(dt)
+
+        pos = self.pos[:n]
+        pos += self.vel[:n] * dt
+        age = self.age[:n]
+        age += dt * 1000
+        frame = self.frame[:n]
+        frame += self.animation_speed[:n] * dt
+        frame[frame >= self.frame_count[:n]] = 0
+
+        # Expire everything past its lifespan in one pass; kill() swap-removes each row
+        expired = np.nonzero(age > self.lifespan[:n])[0].tolist()
+        if expired:
+            for sprite in [self.sprites[slot] for slot in expired]:
+                sprite.kill()
+            n = self.count
+
+        # Sprites are thin views; push positions and frames back for collisions and drawing
+        centers = np.rint(self.pos[:n]).astype(np.int64).tolist()
+        frames = self.frame[:n].astype(np.int64).tolist()
+        for sprite, center, frame_index in zip(self.sprites, centers, frames):
+            sprite.sync(center, frame_index)
@@ -0,0 +1,64 @@
+import struct
+
+from controls import ScriptedControls
+from settings import SIM_RATE
+
+MAGIC = b'MPSR'
+VERSION = 2
+# magic, version, seed, simulation rate, world size (0 for the fixed map), number of runs
+HEADER = struct.Struct('<4sHQHII')
+RUN = struct.Struct('<HB')  # ticks, buttons held for those ticks
+MAX_RUN = 0xFFFF
+
+
+class Recording:
+    def __init__(self, seed, sim_rate=SIM_RATE, runs=None, world=0):
+        self.seed = seed
+        self.sim_rate = sim_rate
+        self.world = world  # Side of the streamed ChunkedWorld played in, in cells; 0 for the fixed map
+        # Per-tick buttons, run-length encoded as [ticks, buttons]; a held key is one entry
+        self.runs = runs if runs is not None else []
+
+    @property
+    def ticks(self):
+        return sum(ticks for ticks, _ in self.runs)
+
+    def append(self, buttons):
+        runs = self.runs
+        if runs and runs[-1][1] == buttons and runs[-1][0] < MAX_RUN:
+            runs[-1][0] += 1
+        else:
+            runs.append([1, buttons])
+
+    def controls(self):
+        # Plays the recorded buttons back one tick at a time, then releases everything
+        return ScriptedControls([tuple(run) for run in self.runs], loop=False)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, self.sim_rate, self.world, len(self.runs)))
+            f.write(b''.join(RUN.pack(ticks, buttons) for ticks, buttons in self.runs))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        magic, version, seed, sim_rate, world, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} recording")
+        runs = [list(run) for run in RUN.iter_unpack(data[HEADER.size:HEADER.size + count * RUN.size])]
+        return cls(seed, sim_rate, runs, world)
+
+
+class RecordingControls:
+    def __init__(self, controls, recording):
+        self.controls = controls
+        self.recording = recording
+        self.buttons = 0
+
+    def poll(self):
+        # Pass the wrapped input through, keeping a copy of every tick
+        self.controls.poll()
+        self.buttons = self.controls.buttons
+        self.recording.append(self.buttons)
@@ -4,3 +4,26 @@ FPS = 60
 TITLE = "Mushroom Panic Survivor"
 TILE_SIZE = 48
 BG_COLOR = (30, 30, 30)  # dark gray background
+CHUNK_SIZE = 16  # static terrain is baked into chunks of CHUNK_SIZE x CHUNK_SIZE tiles
+BATCHED_ENEMIES = True  # simulate enemies in NumPy arrays when NumPy is installed
+PARTICLE_BUDGET = 4096  # max live death particles; emits beyond this are dropped
+SIM_RATE = 120  # fixed simulation steps per second, independent of the render rate
+MAX_SIM_STEPS = 8  # most steps run per rendered frame before the backlog is dropped
+MAX_LIVE_ENEMIES = 500  # wave director stops spawning at this many live enemies
+SPAWNS_PER_TICK = 10  # most enemies placed in one tick; bigger waves spread over later ticks
+LOD_MARGIN = TILE_SIZE * 2  # enemies this far outside the screen still get full updates
+LOD_INTERVAL = 4  # off-screen enemies are moved once every this many ticks
+LOD_PARK_DISTANCE = SCREEN_WIDTH * 2  # enemies further than this from the player are frozen
+LOD_DESPAWN_DISTANCE = SCREEN_WIDTH * 4  # and further than this returned to the pool (None: never)
+ROTATION_BUCKETS = 32  # projectile images are pre-rotated to this many evenly spaced angles
+MAX_GEMS = 400  # resting XP gems on the map; further drops merge into nearby gems
+MAGNET_RADIUS = 100  # pixels around the player that XP gems are pulled in from
+WORLD_CELL_CACHE = 256  # generated world chunks kept in memory (least recently used are dropped)
+WORLD_SURFACE_CACHE = 12  # baked world chunk images kept for drawing
+FLOW_FIELD_RADIUS = 24  # cells around the player that enemy paths are searched in, on streamed worlds
+SEPARATION_RADIUS = TILE_SIZE  # enemies closer than this push each other apart
+SEPARATION_WEIGHT = 2.0  # strength of that push relative to chasing the player
+SEPARATION_NEIGHBORS = 3  # most enemies per neighboring cell each enemy is pushed by
+SEPARATION_INTERVAL = 2  # batched enemies recompute that push once every this many ticks
+DIRTY_RECTS = True  # while the camera is still, redraw and push only the screen areas that changed
+DIRTY_RECT_LIMIT = 300  # more changed areas than this in a frame and the whole screen is pushed instead
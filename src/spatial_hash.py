@@ -0,0 +1,48 @@
+class SpatialHash:
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}  # (cell_x, cell_y) -> list of sprites whose rect touches that cell
+
+    def clear(self):
+        self.cells.clear()
+
+    def cell_range(self, rect):
+        size = self.cell_size
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def insert(self, sprite):
+        left, top, right, bottom = self.cell_range(sprite.rect)
+        cells = self.cells
+        for cell_y in range(top, bottom + 1):
+            for cell_x in range(left, right + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if bucket is None:
+                    cells[(cell_x, cell_y)] = [sprite]
+                else:
+                    bucket.append(sprite)
+
+    def rebuild(self, sprites):
+        # Called once per tick; cheaper than tracking every move incrementally
+        self.cells.clear()
+        for sprite in sprites:
+            self.insert(sprite)
+
+    def query(self, rect):
+        """Broad phase: every sprite sharing a cell with rect, without duplicates."""
+        left, top, right, bottom = self.cell_range(rect)
+        cells = self.cells
+        if left == right and top == bottom:
+            return list(cells.get((left, top), ()))
+
+        found = {}
+        for cell_y in range(top, bottom + 1):
+            for cell_x in range(left, right + 1):
+                for sprite in cells.get((cell_x, cell_y), ()):
+                    found[sprite] = None
+        return list(found)
+
+    def collide(self, rect):
+        """Narrow phase: live sprites from the broad phase whose rect overlaps rect."""
+        return [sprite for sprite in self.query(rect)
+                if sprite.alive() and rect.colliderect(sprite.rect)]
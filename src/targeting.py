@@ -0,0 +1,127 @@
+import math
+try:
+    import numpy as np
+except ImportError:  # Only rebuild_rects needs it, and only callers with NumPy arrays use that
+    np = None
+from spatial_hash import SpatialHash
+
+
+class TargetIndex(SpatialHash):
+    """SpatialHash of live enemies with distance queries for targeting; the level rebuilds it
+    once per tick and every weapon and homing projectile queries the same build."""
+
+    def __init__(self, cell_size):
+        super().__init__(cell_size)
+        self.bounds = None  # (left, top, right, bottom) of occupied cells, None when empty
+
+    def rebuild(self, sprites):
+        super().rebuild(sprites)
+        if self.cells:
+            xs = [cell_x for cell_x, _ in self.cells]
+            ys = [cell_y for _, cell_y in self.cells]
+            self.bounds = (min(xs), min(ys), max(xs), max(ys))
+        else:
+            self.bounds = None
+
+    def rebuild_rects(self, sprites, rects):
+        """rebuild() from rects given as an (n, 4) NumPy array of left, top, right, bottom (e.g.
+        EnemySwarm.rects()) instead of each sprite's rect; sprites are bucketed in list order."""
+        self.cells = {}
+        self.bounds = None
+        if not len(sprites):
+            return
+        size = self.cell_size
+        left, top = rects[:, 0] // size, rects[:, 1] // size
+        right, bottom = (rects[:, 2] - 1) // size, (rects[:, 3] - 1) // size
+
+        # One (cell, sprite) entry per cell each rect touches, then grouped by cell
+        owners, xs, ys = [], [], []
+        for dy in range(int((bottom - top).max()) + 1):
+            for dx in range(int((right - left).max()) + 1):
+                index = np.flatnonzero((left + dx <= right) & (top + dy <= bottom))
+                owners.append(index)
+                xs.append(left[index] + dx)
+                ys.append(top[index] + dy)
+        owners, xs, ys = np.concatenate(owners), np.concatenate(xs), np.concatenate(ys)
+        order = np.lexsort((owners, ys, xs))
+        owners, xs, ys = owners[order].tolist(), xs[order], ys[order]
+        starts = np.flatnonzero(np.diff(xs, prepend=xs[0] - 1) | np.diff(ys, prepend=ys[0] - 1))
+        ends = [*starts[1:].tolist(), len(owners)]
+        cells = self.cells
+        for x, y, start, end in zip(xs[starts].tolist(), ys[starts].tolist(), starts.tolist(), ends):
+            cells[(x, y)] = [sprites[i] for i in owners[start:end]]
+        self.bounds = (int(xs[0]), int(ys.min()), int(xs[-1]), int(ys.max()))
+
+    def nearest(self, pos, k=1, max_distance=None):
+        """Up to k live sprites closest to pos (by rect center), nearest first."""
+        if self.bounds is None or k <= 0:
+            return []
+
+        size = self.cell_size
+        x, y = pos
+        cell_x, cell_y = int(x // size), int(y // size)
+        left, top, right, bottom = self.bounds
+        # Rings past this one can't hold anything
+        last_ring = max(cell_x - left, right - cell_x, cell_y - top, bottom - cell_y)
+        if max_distance is not None:
+            last_ring = min(last_ring, int(max_distance // size) + 1)
+
+        found = {}  # sprite -> distance
+        cells = self.cells
+        for ring in range(last_ring + 1):
+            # Walk the square ring of cells `ring` steps out from pos
+            for cy in range(cell_y - ring, cell_y + ring + 1):
+                edge = cy == cell_y - ring or cy == cell_y + ring
+                for cx in (range(cell_x - ring, cell_x + ring + 1) if edge else (cell_x - ring, cell_x + ring)):
+                    for sprite in cells.get((cx, cy), ()):
+                        if sprite not in found and sprite.alive():
+                            center_x, center_y = sprite.rect.center
+                            found[sprite] = math.hypot(center_x - x, center_y - y)
+
+            # Anything centered within ring * size of pos has been seen by now
+            reach = ring * size
+            if max_distance is not None:
+                reach = min(reach, max_distance)
+            if sum(1 for distance in found.values() if distance <= reach) >= k:
+                break
+
+        ordered = sorted(found.items(), key=lambda item: item[1])
+        if max_distance is not None:
+            ordered = [item for item in ordered if item[1] <= max_distance]
+        return [sprite for sprite, _ in ordered[:k]]
+
+    def within(self, pos, radius):
+        """Live sprites whose rect center is within radius of pos."""
+        x, y = pos
+        size = self.cell_size
+        left, top = int((x - radius) // size), int((y - radius) // size)
+        right, bottom = int((x + radius) // size), int((y + radius) // size)
+
+        found = {}
+        cells = self.cells
+        for cell_y in range(top, bottom + 1):
+            for cell_x in range(left, right + 1):
+                for sprite in cells.get((cell_x, cell_y), ()):
+                    if sprite not in found and sprite.alive():
+                        center_x, center_y = sprite.rect.center
+                        if math.hypot(center_x - x, center_y - y) <= radius:
+                            found[sprite] = None
+        return list(found)
+
+    def within_cone(self, pos, direction, half_angle, radius):
+        """Live sprites within radius of pos and at most half_angle degrees off direction."""
+        x, y = pos
+        length = math.hypot(*direction)
+        if length == 0:
+            return []
+        dir_x, dir_y = direction[0] / length, direction[1] / length
+        min_cos = math.cos(math.radians(half_angle))
+
+        found = []
+        for sprite in self.within(pos, radius):
+            dx = sprite.rect.centerx - x
+            dy = sprite.rect.centery - y
+            distance = math.hypot(dx, dy)
+            if distance == 0 or (dx * dir_x + dy * dir_y) / distance >= min_cos:
+                found.append(sprite)
+        return found
@@ -0,0 +1,62 @@
+import pygame
+from settings import TILE_SIZE, CHUNK_SIZE
+from profiler import profiler
+
+
+def bake_chunk(cells, start, stride, width, height, floor_image, cell_images):
+    """Render a width x height block of cells (row-major with `stride` cells per row, the first
+    at cells[start]): a floor tile everywhere, then the image cell_images has for the cell's value."""
+    chunk = pygame.Surface((width * TILE_SIZE, height * TILE_SIZE)).convert()
+    profiler.increment('surface allocs')
+    for row in range(height):
+        first = start + row * stride
+        line = cells[first:first + width]
+        for col in range(width):
+            pos = (col * TILE_SIZE, row * TILE_SIZE)
+            chunk.blit(floor_image, pos)
+            image = cell_images.get(line[col])
+            if image is not None:
+                chunk.blit(image, pos)
+    return chunk
+
+
+def visible_chunks(viewport, cols, rows):
+    """(chunk_x, chunk_y), screen position of every chunk of a cols x rows cell grid overlapping
+    viewport (a world-space rect)."""
+    chunk_pixels = CHUNK_SIZE * TILE_SIZE
+    first_x = max(0, viewport.left // chunk_pixels)
+    first_y = max(0, viewport.top // chunk_pixels)
+    last_x = min((cols - 1) // CHUNK_SIZE, (viewport.right - 1) // chunk_pixels)
+    last_y = min((rows - 1) // CHUNK_SIZE, (viewport.bottom - 1) // chunk_pixels)
+    for chunk_y in range(first_y, last_y + 1):
+        for chunk_x in range(first_x, last_x + 1):
+            yield (chunk_x, chunk_y), (chunk_x * chunk_pixels - viewport.x, chunk_y * chunk_pixels - viewport.y)
+
+
+class TerrainLayer:
+    def __init__(self, cells, cols, rows, floor_image, cell_images):
+        # cells holds cols * rows cell characters, row-major; images are TILE_SIZE already, and
+        # cell_images maps a cell character's byte value (e.g. ord("X")) to the image drawn over the floor
+        self.cols = cols
+        self.rows = rows
+        self.chunks = {}  # (chunk_x, chunk_y) -> pre-rendered Surface
+
+        self.floor_image = floor_image
+        self.cell_images = cell_images
+
+        self.bake(cells)
+
+    def bake(self, cells):
+        cols, rows = self.cols, self.rows
+        for chunk_y in range(0, rows, CHUNK_SIZE):
+            for chunk_x in range(0, cols, CHUNK_SIZE):
+                # Edge chunks only cover the tiles that are left
+                width = min(CHUNK_SIZE, cols - chunk_x)
+                height = min(CHUNK_SIZE, rows - chunk_y)
+                self.chunks[(chunk_x // CHUNK_SIZE, chunk_y // CHUNK_SIZE)] = bake_chunk(
+                    cells, chunk_y * cols + chunk_x, cols, width, height, self.floor_image, self.cell_images)
+
+    def draw(self, surface, viewport):
+        # Only blit the chunks overlapping the viewport
+        for key, pos in visible_chunks(viewport, self.cols, self.rows):
+            surface.blit(self.chunks[key], pos)
@@ -0,0 +1,25 @@
+from settings import SIM_RATE, MAX_SIM_STEPS
+
+
+class FixedTimestep:
+    def __init__(self, rate=SIM_RATE, max_steps=MAX_SIM_STEPS):
+        self.step = 1 / rate  # seconds of simulation per update
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, frame_time):
+        """Add a rendered frame's real time and return how many fixed steps to simulate."""
+        self.accumulator += frame_time
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            # Too far behind (debugger, window drag, huge hitch): catch up a little and drop the rest
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step
+        return steps
+
+    @property
+    def alpha(self):
+        # How far the renderer is between the last two simulation steps
+        return min(1.0, self.accumulator / self.step)
@@ -0,0 +1,103 @@
+import math
+from collections import deque
+from settings import TILE_SIZE, MAX_LIVE_ENEMIES, SPAWNS_PER_TICK
+
+# Default wave data; times are seconds since the level started
+WAVES = {
+    # Steady spawns per second as (time, rate) keyframes, linearly interpolated and held after the last
+    'spawn_curve': [(0, 0.33), (60, 1.0), (180, 3.0), (600, 8.0)],
+    # Which enemy types the steady spawns draw from as (time, {type: weight}), from that time on
+    'enemy_mix': [
+        (0, {'blob': 1}),
+        (60, {'blob': 3, 'runner': 1}),
+        (180, {'blob': 3, 'runner': 2, 'brute': 1}),
+    ],
+    # One-off hordes as (time, count, type); a type of None draws from the current mix
+    'bursts': [(90, 40, 'runner'), (240, 120, None), (480, 300, None)],
+}
+
+
+def interpolate(keyframes, time):
+    # Piecewise-linear lookup in sorted (time, value) keyframes
+    previous_time, previous_value = keyframes[0]
+    if time <= previous_time:
+        return previous_value
+    for key_time, value in keyframes[1:]:
+        if time < key_time:
+            t = (time - previous_time) / (key_time - previous_time)
+            return previous_value + (value - previous_value) * t
+        previous_time, previous_value = key_time, value
+    return previous_value
+
+
+class WaveDirector:
+    def __init__(self, level, waves=WAVES, max_live=MAX_LIVE_ENEMIES, spawns_per_tick=SPAWNS_PER_TICK):
+        self.level = level
+        self.random = level.random  # Level's seeded RNG, so recorded sessions replay the same waves
+        self.spawn_curve = waves['spawn_curve']
+        self.enemy_mix = waves['enemy_mix']
+        self.bursts = sorted(waves['bursts'], key=lambda burst: burst[0])
+        self.max_live = max_live  # No spawns while this many enemies are alive
+        self.spawns_per_tick = spawns_per_tick  # Big waves trickle in over several ticks
+
+        self.time = 0.0
+        self.credit = 0.0  # Fractional steady spawns owed
+        self.next_burst = 0
+        self.queue = deque()  # Enemy types waiting to be placed
+
+    def pick_type(self):
+        mix = self.enemy_mix[0][1]
+        for start, weights in self.enemy_mix:
+            if self.time < start:
+                break
+            mix = weights
+        return self.random.choices(list(mix), weights=list(mix.values()))[0]
+
+    def update(self, dt):
+        self.time += dt
+        live = len(self.level.enemy_sprites)
+
+        # Steady spawns follow the curve, but aren't banked up while the level is full
+        self.credit += interpolate(self.spawn_curve, self.time) * dt
+        while self.credit >= 1:
+            self.credit -= 1
+            if live + len(self.queue) < self.max_live:
+                self.queue.append(self.pick_type())
+
+        # Bursts are queued whole and drained at spawns_per_tick
+        while self.next_burst < len(self.bursts) and self.bursts[self.next_burst][0] <= self.time:
+            _, count, enemy_type = self.bursts[self.next_burst]
+            self.next_burst += 1
+            room = self.max_live - live - len(self.queue)
+            for _ in range(max(0, min(count, room))):
+                self.queue.append(enemy_type or self.pick_type())
+
+        for _ in range(min(len(self.queue), self.spawns_per_tick, self.max_live - live)):
+            self.level.spawn_enemy(self.spawn_position(), self.queue.popleft())
+
+    def spawn_position(self, attempts=8):
+        # A random open, reachable cell just outside the screen; map spawn points if none is found
+        level = self.level
+        grid = level.collision_grid
+        flow_field = level.flow_field
+        player_x, player_y = level.player_sprite.rect.center
+        # The screen as it will be around the player (the camera's own viewport only moves on draw)
+        view = level.visible_sprites.viewport.copy()
+        view.center = (player_x, player_y)
+        near = math.hypot(view.width, view.height) / 2 + TILE_SIZE
+
+        for _ in range(attempts):
+            angle = self.random.uniform(0, math.tau)
+            distance = near + self.random.uniform(0, 3 * TILE_SIZE)
+            x = player_x + math.cos(angle) * distance
+            y = player_y + math.sin(angle) * distance
+            col, row = int(x // TILE_SIZE), int(y // TILE_SIZE)
+            if grid.is_solid(col, row) or not flow_field.reachable(col, row):
+                continue
+            return (col * TILE_SIZE + TILE_SIZE // 2, row * TILE_SIZE + TILE_SIZE // 2)
+
+        hidden = [point for point in level.enemy_spawn_points if not view.collidepoint(point)]
+        points = hidden or level.enemy_spawn_points
+        if points:
+            return self.random.choice(points)
+        return None
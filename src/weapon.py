@@ -1,9 +1,33 @@
 import pygame
 from projectile import Projectile
 from effect_projectile import EffectProjectile
+from pool import Pool
+from profiler import profiler
+
+# Where shots go:
+#   "direction" - the direction passed to shoot() (the owner's movement)
+#   "nearest"   - the `shots` nearest enemies within target_range
+#   "cone"      - the nearest enemy within CONE_HALF_ANGLE degrees of the movement direction
+TARGETING_MODES = ("direction", "nearest", "cone")
+CONE_HALF_ANGLE = 30
+
+# Weapons a loadout can be built from, as Weapon keyword arguments
+WEAPON_PRESETS = {
+    "orb": dict(effect_type="blue_orb", cooldown=2000, speed=250, lifespan=2000, damage=10, targeting="nearest"),
+    "kunai": dict(effect_type="ice_kunai", cooldown=600, speed=420, lifespan=1200, damage=6),
+    "shuriken": dict(effect_type="ice_shuriken", cooldown=900, speed=300, lifespan=1500, damage=8, targeting="nearest", shots=3),
+    "flame": dict(effect_type="ice_flame", cooldown=400, speed=200, lifespan=900, damage=4, targeting="cone"),
+    "spark": dict(effect_type="ice_spark", cooldown=1200, speed=260, lifespan=2500, damage=12, targeting="nearest", homing=270),
+    "loop": dict(effect_type="ice_loop", cooldown=1500, speed=180, lifespan=3000, damage=6, targeting="nearest", shots=2, homing=120),
+    "hadouken": dict(effect_type="hadouken", cooldown=1000, speed=350, lifespan=1500, damage=15),
+    "ember": dict(effect_type="fading_fire", cooldown=700, speed=150, lifespan=1000, damage=5, targeting="cone", shots=2),
+    "wave": dict(effect_type="large_blue_wave", cooldown=2500, speed=200, lifespan=2500, damage=20, targeting="nearest"),
+    "orb_swarm": dict(effect_type="blue_orb", cooldown=3000, speed=160, lifespan=3000, damage=8, targeting="nearest", shots=4, homing=90),
+}
 
 class Weapon:
-    def __init__(self, owner, projectile_group, image=None, cooldown=500, speed=300, lifespan=2000, damage=10, weapon_type="basic", effect_type=None):
+    def __init__(self, owner, projectile_group, image=None, cooldown=500, speed=300, lifespan=2000, damage=10, weapon_type="basic", effect_type=None,
+                 targeting="direction", targets=None, target_range=400, shots=1, homing=0, projectile_batch=None):
         self.owner = owner  # the player or enemy using the weapon
         self.projectile_group = projectile_group
         self.image = image
@@ -13,12 +37,34 @@ class Weapon:
         self.damage = damage
         self.weapon_type = weapon_type
         self.effect_type = effect_type
-        self.last_shot = 0
+        self.time_since_shot = 0  # ms of simulation time, advanced by update()
+
+        # Targeting; targets is the level's TargetIndex, shared by every weapon and projectile
+        if targeting not in TARGETING_MODES:
+            raise ValueError(f"Unknown targeting mode {targeting!r}")
+        self.targeting = targeting
+        self.targets = targets
+        self.target_range = target_range
+        self.shots = shots  # Projectiles per shot ("nearest" aims each at a different enemy)
+        self.homing = homing  # Turn rate of the projectiles in degrees per second, 0 flies straight
+
+        # Moves every launched projectile in bulk, when the level has one
+        self.projectile_batch = projectile_batch
+
+        # Spent projectiles come back here on kill() and are relaunched by shoot()
+        self.projectile_pool = Pool(EffectProjectile if effect_type else Projectile)
         
         # Cooldown visualization
         self.cooldown_surface = pygame.Surface((20, 4))
         self.cooldown_surface.fill((50, 50, 50))
         self.cooldown_rect = self.cooldown_surface.get_rect()
+        # Full-width progress bars (charging, ready); draw_cooldown blits the filled part of one
+        self.progress_surfaces = []
+        for color in ((0, 100, 255), (0, 0, 255)):
+            progress = pygame.Surface(self.cooldown_rect.size)
+            progress.fill(color)
+            self.progress_surfaces.append(progress)
+        profiler.increment('surface allocs', 3)
         
         # Sound effects
         self.shoot_sound = None  # Will be loaded if sound file exists
@@ -27,49 +73,83 @@ class Weapon:
         except:
             print("No shoot sound found")
 
+    def update(self, dt):
+        # Timers follow simulation time, not the wall clock, so runs are reproducible
+        self.time_since_shot += dt * 1000
+
+    def aim(self, direction):
+        # Directions to fire in for one shot; falls back to direction when nothing is targeted
+        origin = pygame.Vector2(self.owner.rect.center)
+        enemies = []
+        if self.targets is not None:
+            if self.targeting == "nearest":
+                enemies = self.targets.nearest(origin, self.shots, self.target_range)
+            elif self.targeting == "cone":
+                in_cone = self.targets.within_cone(origin, direction, CONE_HALF_ANGLE, self.target_range)
+                enemies = sorted(in_cone, key=lambda enemy: origin.distance_squared_to(enemy.rect.center))[:1]
+
+        directions = []
+        for enemy in enemies:
+            to_enemy = pygame.Vector2(enemy.rect.center) - origin
+            if to_enemy.length_squared() > 0:
+                directions.append((to_enemy.x, to_enemy.y))
+        if not directions:
+            directions.append(direction)
+        # Extra shots without a target of their own follow the first
+        while len(directions) < self.shots:
+            directions.append(directions[0])
+        return directions
+
     def shoot(self, direction=(1, 0)):
-        now = pygame.time.get_ticks()
-        if now - self.last_shot >= self.cooldown:
-            self.last_shot = now
-            
-            # Create projectile based on whether we're using effects or basic projectiles
-            if self.effect_type:
-                projectile = EffectProjectile(
-                    pos=self.owner.rect.center,
-                    direction=direction,
-                    speed=self.speed,
-                    lifespan=self.lifespan,
-                    effect_type=self.effect_type,
-                    damage=self.damage,
-                    weapon_type=self.weapon_type
-                )
-            else:
-                projectile = Projectile(
-                    pos=self.owner.rect.center,
-                    direction=direction,
-                    speed=self.speed,
-                    lifespan=self.lifespan,
-                    image=self.image,
-                    damage=self.damage,
-                    weapon_type=self.weapon_type
-                )
-            
-            self.projectile_group.add(projectile)
+        if self.time_since_shot >= self.cooldown:
+            self.time_since_shot = 0
+            for aim in self.aim(direction):
+                self.launch(aim)
             
             # Play sound if available
             if self.shoot_sound:
                 self.shoot_sound.play()
 
+    def launch(self, direction):
+        # Create projectile based on whether we're using effects or basic projectiles
+        if self.effect_type:
+            projectile = self.projectile_pool.acquire(
+                pos=self.owner.rect.center,
+                direction=direction,
+                speed=self.speed,
+                lifespan=self.lifespan,
+                effect_type=self.effect_type,
+                damage=self.damage,
+                weapon_type=self.weapon_type
+            )
+        else:
+            projectile = self.projectile_pool.acquire(
+                pos=self.owner.rect.center,
+                direction=direction,
+                speed=self.speed,
+                lifespan=self.lifespan,
+                image=self.image,
+                damage=self.damage,
+                weapon_type=self.weapon_type
+            )
+        if self.homing:
+            projectile.homing = self.homing
+            projectile.targets = self.targets
+            projectile.target_range = self.target_range
+        if self.projectile_batch:
+            self.projectile_batch.add(projectile)
+        
+        self.projectile_group.add(projectile)
+
     def draw_cooldown(self, surface, pos):
-        # Draw cooldown bar
-        current_time = pygame.time.get_ticks()
-        cooldown_progress = min(1.0, (current_time - self.last_shot) / self.cooldown)
+        # Draw cooldown bar; returns the screen rect it covers
+        cooldown_progress = min(1.0, self.time_since_shot / self.cooldown) if self.cooldown else 1.0
         
-        # Create progress bar
+        # Only the filled part of the cached progress bar is blitted
         progress_width = int(self.cooldown_rect.width * cooldown_progress)
-        progress_surface = pygame.Surface((progress_width, self.cooldown_rect.height))
-        progress_surface.fill((0, 0, 255) if cooldown_progress == 1.0 else (0, 100, 255))
+        progress_surface = self.progress_surfaces[cooldown_progress == 1.0]
         
         # Draw both surfaces
-        surface.blit(self.cooldown_surface, pos)
-        surface.blit(progress_surface, pos)
+        area = surface.blit(self.cooldown_surface, pos)
+        surface.blit(progress_surface, pos, (0, 0, progress_width, self.cooldown_rect.height))
+        return area
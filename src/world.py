@@ -0,0 +1,120 @@
+import random
+from collections import OrderedDict
+from settings import CHUNK_SIZE, WORLD_CELL_CACHE, WORLD_SURFACE_CACHE
+from collision_grid import CollisionGrid
+from terrain import bake_chunk, visible_chunks
+
+EMPTY = 0
+WALL = 1
+CHEST = 2
+SOLID = (WALL, CHEST)
+SOLID_FLAGS = bytes(1 if value in SOLID else 0 for value in range(256))  # cell value -> solid flag
+
+
+class ChunkedWorld(CollisionGrid):
+    """A big seeded arena generated and held a chunk at a time.
+
+    Cells of CHUNK_SIZE x CHUNK_SIZE chunks are generated on first use and kept in an LRU;
+    chunk images are baked only when drawn and kept in a smaller LRU. Usable wherever a
+    CollisionGrid (movement, flow fields) or a TerrainLayer (camera) is expected.
+    """
+
+    def __init__(self, cols, rows, seed=0, floor_image=None, cell_images=None,
+                 cell_cache=WORLD_CELL_CACHE, surface_cache=WORLD_SURFACE_CACHE):
+        self.cols = cols
+        self.rows = rows
+        self.seed = seed
+        self.floor_image = floor_image
+        self.cell_images = cell_images or {}  # cell value (WALL, CHEST) -> image drawn over the floor
+
+        self.cells = OrderedDict()  # (chunk_x, chunk_y) -> bytearray of cell values, row-major
+        self.surfaces = OrderedDict()  # (chunk_x, chunk_y) -> baked Surface
+        self.cell_cache = cell_cache
+        self.surface_cache = surface_cache
+
+    def chunk(self, chunk_x, chunk_y):
+        key = (chunk_x, chunk_y)
+        cells = self.cells.get(key)
+        if cells is None:
+            cells = self.cells[key] = self.generate(chunk_x, chunk_y)
+            if len(self.cells) > self.cell_cache:
+                self.cells.popitem(last=False)
+        else:
+            self.cells.move_to_end(key)
+        return cells
+
+    def generate(self, chunk_x, chunk_y):
+        # Same seed and chunk, same cells, however often the chunk is evicted and rebuilt
+        rng = random.Random(f"{self.seed}:{chunk_x}:{chunk_y}")
+        cells = bytearray(CHUNK_SIZE * CHUNK_SIZE)
+        first_col = chunk_x * CHUNK_SIZE
+        first_row = chunk_y * CHUNK_SIZE
+
+        # A few wall blocks and the odd chest, away from the chunk edges so paths stay open
+        for _ in range(rng.randint(1, 4)):
+            width, height = rng.randint(1, 5), rng.randint(1, 5)
+            left, top = rng.randint(1, CHUNK_SIZE - width - 1), rng.randint(1, CHUNK_SIZE - height - 1)
+            for row in range(top, top + height):
+                cells[row * CHUNK_SIZE + left:row * CHUNK_SIZE + left + width] = bytes([WALL]) * width
+        if rng.random() < 0.3:
+            cells[rng.randrange(len(cells))] = CHEST
+
+        # Border walls around the arena, and a clear area around the player's start
+        center_col, center_row = self.cols // 2, self.rows // 2
+        last_col, last_row = first_col + CHUNK_SIZE - 1, first_row + CHUNK_SIZE - 1
+        on_border = first_col == 0 or first_row == 0 or last_col >= self.cols - 1 or last_row >= self.rows - 1
+        near_start = first_col - 3 <= center_col <= last_col + 3 and first_row - 3 <= center_row <= last_row + 3
+        if not (on_border or near_start):
+            return cells
+        for row in range(CHUNK_SIZE):
+            for col in range(CHUNK_SIZE):
+                world_col, world_row = first_col + col, first_row + row
+                if world_col in (0, self.cols - 1) or world_row in (0, self.rows - 1):
+                    cells[row * CHUNK_SIZE + col] = WALL
+                elif abs(world_col - center_col) <= 3 and abs(world_row - center_row) <= 3:
+                    cells[row * CHUNK_SIZE + col] = EMPTY
+        return cells
+
+    def cell(self, col, row):
+        return self.chunk(col // CHUNK_SIZE, row // CHUNK_SIZE)[(row % CHUNK_SIZE) * CHUNK_SIZE + col % CHUNK_SIZE]
+
+    def is_solid(self, col, row):
+        # Anything outside the arena counts as a wall
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.cell(col, row) in SOLID
+        return True
+
+    def window(self, left, top, cols, rows):
+        # Copied a chunk-row slice at a time rather than cell by cell
+        out = bytearray(b'\x01') * (cols * rows)
+        first_col = max(0, left)
+        last_col = min(self.cols, left + cols)
+        for row in range(max(0, top), min(self.rows, top + rows)):
+            chunk_y, cell_row = divmod(row, CHUNK_SIZE)
+            col = first_col
+            while col < last_col:
+                chunk_x, cell_col = divmod(col, CHUNK_SIZE)
+                width = min(CHUNK_SIZE - cell_col, last_col - col)
+                offset = cell_row * CHUNK_SIZE + cell_col
+                start = (row - top) * cols + col - left
+                out[start:start + width] = self.chunk(chunk_x, chunk_y)[offset:offset + width].translate(SOLID_FLAGS)
+                col += width
+        return out
+
+    def bake(self, chunk_x, chunk_y):
+        width = min(CHUNK_SIZE, self.cols - chunk_x * CHUNK_SIZE)
+        height = min(CHUNK_SIZE, self.rows - chunk_y * CHUNK_SIZE)
+        return bake_chunk(self.chunk(chunk_x, chunk_y), 0, CHUNK_SIZE, width, height,
+                          self.floor_image, self.cell_images)
+
+    def draw(self, surface, viewport):
+        # Only blit the chunks overlapping the viewport, baking them on demand
+        for key, pos in visible_chunks(viewport, self.cols, self.rows):
+            chunk = self.surfaces.get(key)
+            if chunk is None:
+                chunk = self.surfaces[key] = self.bake(*key)
+                if len(self.surfaces) > self.surface_cache:
+                    self.surfaces.popitem(last=False)
+            else:
+                self.surfaces.move_to_end(key)
+            surface.blit(chunk, pos)
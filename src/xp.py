@@ -0,0 +1,126 @@
+import pygame
+from settings import TILE_SIZE, MAX_GEMS, MAGNET_RADIUS
+from pool import Pool, PooledSprite
+from profiler import profiler
+
+# (minimum value, color) per gem tier; merged gems move up the tiers as their value grows
+GEM_TIERS = [(1, (80, 160, 255)), (5, (80, 220, 120)), (25, (255, 80, 80)), (100, (200, 90, 255))]
+GEM_SIZE = 12
+GEM_ACCELERATION = 900  # Pixels per second squared while flying towards the player
+PICKUP_DISTANCE = 16
+
+# Tier color -> diamond image, drawn on first use
+gem_images = {}
+
+
+def xp_for_level(level):
+    # XP needed to go from level to level + 1
+    return int(5 * level ** 1.5)
+
+
+def gem_image(value):
+    color = GEM_TIERS[0][1]
+    for minimum, tier_color in GEM_TIERS:
+        if value >= minimum:
+            color = tier_color
+    image = gem_images.get(color)
+    if image is None:
+        image = gem_images[color] = pygame.Surface((GEM_SIZE, GEM_SIZE), pygame.SRCALPHA)
+        profiler.increment('surface allocs')
+        half = GEM_SIZE // 2
+        points = [(half, 0), (GEM_SIZE - 1, half), (half, GEM_SIZE - 1), (0, half)]
+        pygame.draw.polygon(image, color, points)
+        pygame.draw.polygon(image, (255, 255, 255), points, 1)
+    return image
+
+
+class Gem(PooledSprite):
+    def __init__(self, pos, value):
+        super().__init__()
+        self.reset(pos, value)
+
+    def reset(self, pos, value):
+        self.value = value
+        self.cell = None  # Grid cell while resting, None while flying to the player
+        self.speed = 0
+        self.position = pygame.Vector2(pos)
+        self.image = gem_image(value)
+        self.rect = self.image.get_rect(center=pos)
+
+    def add_value(self, value):
+        self.value += value
+        self.image = gem_image(self.value)
+
+
+class XPGems:
+    def __init__(self, visible_sprites, cell_size=TILE_SIZE, max_gems=MAX_GEMS, magnet_radius=MAGNET_RADIUS):
+        self.visible_sprites = visible_sprites
+        self.cell_size = cell_size
+        self.max_gems = max_gems  # Resting gems on the map; further drops merge into existing ones
+        self.magnet_radius = magnet_radius
+        self.cells = {}  # (cell_x, cell_y) -> the one gem resting in that cell
+        self.flying = []  # Gems being pulled in by the player's magnet
+        self.pool = Pool(Gem)
+
+    def drop(self, pos, value):
+        size = self.cell_size
+        cell = (int(pos[0] // size), int(pos[1] // size))
+
+        # One gem per cell, and at most max_gems of them: drops merge into a gem nearby
+        gem = self.cells.get(cell)
+        if gem is None and len(self.cells) >= self.max_gems:
+            gem = self.nearest_resting(cell)
+        if gem is not None:
+            gem.add_value(value)
+            return
+
+        gem = self.pool.acquire(pos, value)
+        gem.cell = cell
+        self.cells[cell] = gem
+        self.visible_sprites.add(gem, layer=1)
+
+    def nearest_resting(self, cell, rings=4):
+        cells = self.cells
+        cell_x, cell_y = cell
+        for ring in range(1, rings + 1):
+            for cy in range(cell_y - ring, cell_y + ring + 1):
+                edge = cy == cell_y - ring or cy == cell_y + ring
+                for cx in (range(cell_x - ring, cell_x + ring + 1) if edge else (cell_x - ring, cell_x + ring)):
+                    gem = cells.get((cx, cy))
+                    if gem is not None:
+                        return gem
+        # Nothing close by: pile onto the oldest gem
+        return next(iter(cells.values()))
+
+    def update(self, dt, player):
+        # Only the cells the magnet reaches are looked at, however many gems lie around
+        x, y = player.rect.center
+        radius = player.magnet_radius
+        size = self.cell_size
+        cells = self.cells
+        for cell_y in range(int((y - radius) // size), int((y + radius) // size) + 1):
+            for cell_x in range(int((x - radius) // size), int((x + radius) // size) + 1):
+                gem = cells.get((cell_x, cell_y))
+                if gem is not None and gem.position.distance_to((x, y)) <= radius:
+                    del cells[gem.cell]
+                    gem.cell = None
+                    gem.speed = 0
+                    self.flying.append(gem)
+
+        # Flying gems speed up towards the player and are collected on arrival
+        still_flying = []
+        for gem in self.flying:
+            to_player = pygame.Vector2(x, y) - gem.position
+            distance = to_player.length()
+            gem.speed += GEM_ACCELERATION * dt
+            if distance <= max(PICKUP_DISTANCE, gem.speed * dt):
+                player.gain_xp(gem.value)
+                gem.kill()
+                continue
+            gem.position += to_player * (gem.speed * dt / distance)
+            gem.rect.center = (round(gem.position.x), round(gem.position.y))
+            still_flying.append(gem)
+        self.flying = still_flying
+
+    def count(self):
+        return len(self.cells) + len(self.flying)